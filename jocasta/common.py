@@ -4,6 +4,11 @@ from pywikibot import Page, Category
 from datetime import datetime
 
 
+MESSAGE_LIMIT = 2000
+NOMINATION_ORDINAL_RE = re.compile(r" \((first|second|third|fourth|fifth|sixth) (review|nomination)\)")
+NOMINATED_BY_RE = re.compile(r"Nominated by.*?(User:|U\|)(.*?)[\]|}/]")
+
+
 class ArchiveException(Exception):
     def __init__(self, message):
         self.message = message
@@ -28,23 +33,43 @@ def clean_text(text):
 
 
 def extract_err_msg(e: Exception):
+    if hasattr(e, "message"):
+        return e.message
+    return " " + extract_err_args(e)
+
+
+def extract_err_args(e: Exception):
+    args_str = str(e.args)
     try:
-        if hasattr(e, "message"):
-            return e.message
-        return " " + str(e.args[0] if str(e.args).startswith('(') else e.args)
+        return str(e.args[0]) if args_str.startswith('(') else args_str
     except Exception as _:
-        return str(e.args)
+        return args_str
+
+
+def pack_messages(texts, limit=MESSAGE_LIMIT):
+    """ Joins consecutive texts into as few messages as possible without exceeding Discord's message length limit.
+      A single text that is already over the limit is passed through as-is. """
+    messages = []
+    current = ""
+    for text in texts:
+        if current and len(current) + len(text) + 1 > limit:
+            messages.append(current)
+            current = text
+        else:
+            current = f"{current}\n{text}" if current else text
+    if current:
+        messages.append(current)
+    return messages
 
 
 def determine_target_of_nomination(title):
-    return re.sub(" \((first|second|third|fourth|fifth|sixth) (review|nomination)\)", "", title.split("/", 1)[1])
+    return NOMINATION_ORDINAL_RE.sub("", title.split("/", 1)[1])
 
 
 def determine_title_format(page_title, text) -> str:
     """ Examines the target article's usage of {{Top}} and extracts the title= and title2= parameters, in order to
       generate a properly-formatted pipelink to the target. """
 
-    print(page_title)
     if page_title.startswith("en:"):
         page_title = page_title[3:]
 
@@ -86,11 +111,16 @@ def determine_nominator(page: Page, nom_type: str, nom_page: Page) -> str:
 
 
 def extract_nominator(nom_page: Page, page_text: str = None):
-    match = re.search("Nominated by.*?(User:|U\|)(.*?)[\]\|\}/]", page_text or nom_page.get())
+    match = NOMINATED_BY_RE.search(page_text or nom_page.get())
     if match:
         return match.group(2).replace("_", " ").strip()
     else:
-        return list(nom_page.revisions(reverse=True, total=1))[0]["user"]
+        return first_revision_user(nom_page)
+
+
+def first_revision_user(page: Page):
+    """ Returns the username of the page's creator, i.e. the author of its first revision. """
+    return page.oldest_revision.user
 
 
 def calculate_nominated_revision(*, page: Page, nom_type, raise_error=True, content=False):
@@ -1,20 +1,26 @@
+import asyncio
 import datetime
+import heapq
+import os
+import random
 import re
 import sys
 import traceback
-from typing import Tuple
+from collections import OrderedDict
+from typing import Callable, Tuple
 import time
 import json
-from discord import Message, Game, Intents, HTTPException
-from discord.abc import GuildChannel
+from discord import Message, Game, Intents, HTTPException, Emoji
 from discord.channel import TextChannel, DMChannel
 from discord.ext import commands, tasks
 
 import pywikibot
+from pywikibot.comms import http
 from pywikibot.exceptions import EditConflictError
+from requests.adapters import HTTPAdapter
 from jocasta.auth import build_auth_client
 from jocasta.common import ArchiveException, UnknownCommand, build_analysis_response, clean_text, log, error_log, \
-    word_count, validate_word_count, determine_status_by_word_count, calculate_dates_for_board_members
+    extract_err_args, first_revision_user, pack_messages, word_count, validate_word_count, determine_status_by_word_count, calculate_dates_for_board_members
 from jocasta.version_reader import report_version_info
 from jocasta.twitter import TwitterBot
 
@@ -29,6 +35,11 @@ from jocasta.nominations.objection import check_active_nominations, check_for_ob
 from jocasta.nominations.rankings import update_rankings_table
 from jocasta.nominations.review import Reviewer
 
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
 
 CADE = 346767878005194772
 MONITOR = 268478587651358721
@@ -37,6 +48,8 @@ COMMANDS = "status-article-commands"
 NOM_CHANNEL = "status-article-nominations"
 REVIEWS = "status-article-reviews"
 SOCIAL_MEDIA = "social-media-team"
+ARCHIVE_CHANNELS = frozenset({NOM_CHANNEL, COMMANDS})
+REVIEW_BOARD_ROLES = frozenset({"AgriCorps", "EduCorps", "Inquisitorius"})
 
 THUMBS_UP = "👍"
 TIMER = "⏲️"
@@ -44,19 +57,74 @@ EXCLAMATION = "❗"
 QUESTION = "❓"
 CLOCKS = {0: "🕛", 1: "🕐", 2: "🕑", 3: "🕒", 4: "🕓", 5: "🕔", 6: "🕕", 7: "🕖", 8: "🕗", 9: "🕘", 10: "🕙", 11: "🕚"}
 
+NEW_NOM_REPORT_RE = re.compile(r"New .*?(Featured|Good|Comprehensive) article nomination")
+NOM_WORD_COUNT_RE = re.compile(r"add word count for (?P<status>(Featured|Good|Comprehensive))")
+CHECK_NOMINATION_RE = re.compile(r"check for nomination: (.*?)$")
+MESSAGE_CHANNEL_RE = re.compile(r"message #(?P<channel>.*?): (?P<text>.*?)$")
+WORD_COUNT_RE = re.compile(r"(check )?(word count|count words)( for)?:? (?P<article>.*)")
+MENTION_ARTICLE_RE = re.compile(r"<@[0-9]+> (?P<article>.*)")
+WORD_COUNT_CATEGORY_RE = re.compile(r"check word count for (?P<status>([Ff]eatured|[Gg]ood|[Cc]omprehensive))( article)?(?P<nom> nominations)?")
+NOM_TEMPLATE_RE = re.compile(r"{{[CGF]Anom")
+ANALYZE_RE = re.compile(r"(?:run analysis on|analyze|compare) WP:(?P<nom_type>[FGC]A)")
+PROJECT_STATUS_RE = re.compile(r"add (?P<nt>[CFG]A) to (?P<prj>WP:[A-Za-z]+): (?P<article>.*?)(?: - Nom: (?P<nom>.*?))?$")
+TALK_PAGE_RE = re.compile(r"leave (?P<nom_type>[CGF]AN) message for (?P<user>.*?) about (?P<article>.*?)(?P<x>with custom message: (?P<custom>.*?))?$")
+CREATE_REVIEW_RE = re.compile(r"[Cc]reate review (of|for) (?P<article>.*)")
+PASS_REVIEW_RE = re.compile(r"[Mm]ark review (of|for) (?P<article>.*?) as passed")
+PROBATION_RE = re.compile(r"[Mm]ark review (of|for) (?P<article>.*?) as ((on )?probation|probed)")
+REMOVE_STATUS_RE = re.compile(r"([Rr]emove|[Rr]evoke) status (of|for) (?P<article>.*)")
+NOMINATION_OBJECTIONS_RE = re.compile(r"check (?:for )?objections (?:on|for) (?P<nt>[FGC]AN)(?:: (?P<page>.*?))?$")
+REVIEW_OBJECTIONS_RE = re.compile(r"check (?:for )?objections (?:on|for) (?P<nt>[FGC]A) reviews?(?:: (?P<page>.*?))?$")
+NEW_NOM_COMMAND_RE = re.compile(r"new (?P<nt>[CFG]AN): (?P<article>.*?)(?P<suffix> \([A-Za-z]+ nomination\))?$")
+NOM_LINK_RE = re.compile(r"wiki/(Wookieepedia:[A-Za-z]+_article_nominations/.*)$")
+NOMINATION_SUFFIX_RE = re.compile(r"((.*?) \([A-Za-z]+ nomination\))$")
+UPDATE_RANKINGS_RE = re.compile(r"update rankings table", re.IGNORECASE)
+RANKINGS_TOTAL_RE = re.compile(r"'+Total'+ ?\|+ ?([0-9]+) ?\|+ ?([0-9]+) ?\|+ ?([0-9]+)")
+
+# Matches any message that at least one of the command predicates could accept
+COMMAND_PREFILTER_RE = re.compile(
+    r"reload data|update rankings table|word count|count words|run analysis on|analyze|compare|add [CFG]A |"
+    r"leave [CGF]AN |new [CFG]AN:|check for (new )?nominations|objections|create review|mark review|"
+    r"(remove|revoke) status", re.IGNORECASE)
+
+TITLE_CACHE_SIZE = 1024
+HTTP_POOL_SIZE = 20
+OBJECTION_CHECK_CONCURRENCY = 2
+
+
+def widen_http_pool():
+    """ Mounts a larger connection pool on pywikibot's shared requests session, since wiki calls now run from several
+      worker threads at once and would otherwise queue on (and discard connections from) the default pool of 10. """
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    http.session.mount("https://", adapter)
+    http.session.mount("http://", adapter)
+
+
+def load_revisions(page: pywikibot.Page, total: int):
+    return list(page.revisions(content=True, total=total))
+
 
 class JocastaBot(commands.Bot):
     """
-    :type channels: dict[str, GuildChannel]
-    :type emoji_storage: dict[str, int]
+    :type channels: dict[str, TextChannel]
+    :type emoji_storage: dict[str, Emoji]
     :type analysis_cache: dict[str, dict[str, tuple[int, float]]]
-    :type current_nominations: dict[str, list[str]]
-    :type current_reviews: dict[str, list[str]]
+    :type analysis_expiry: list[tuple[float, str, str]]
+    :type current_nominations: dict[str, set[str]]
+    :type current_reviews: dict[str, set[str]]
     :type nom_types: dict[str, NominationType]
+    :type noms_needing_votes: dict[str, set[str]]
+    :type command_table: list[tuple[Callable, Callable]]
+    :type command_messages: dict[str, dict[int, str]]
+    :type report_channels: dict[str, str]
+    :type archive_lock: asyncio.Lock
+    :type nomination_lock: asyncio.Lock
+    :type review_lock: asyncio.Lock
 
     :type report_dm: discord.DMChannel
     """
 
+    ANALYSIS_CACHE_TTL = 30 * 60
+
     def __init__(self, *, loop=None, **options):
         intents = Intents.default()
         intents.members = True
@@ -66,20 +134,21 @@ class JocastaBot(commands.Bot):
 
         self.refresh = 0
         with open(OBJECTION_SCHEDULE, "r") as f:
-            self.objection_schedule_count = f.readline()
+            self.last_objection_check = f.readline().strip()
 
         self.successful_count = 0
         self.initial_run_twitter = True
         self.ready = False
 
-        self.version = None
-        with open(VERSION_FILE, "r") as f:
-            self.version = f.readline()
+        with open(VERSION_FILE, "r", encoding="utf-8") as f:
+            self.version = f.readline().strip() or None
+        self.command_messages = {}
 
         self.twitter_bot = TwitterBot(client=build_auth_client())
         self.channels = {}
         self.emoji_storage = {}
 
+        widen_http_pool()
         self.archiver = Archiver(test_mode=False, auto=True, timezone_offset=self.timezone_offset)
         self.reviewer = Reviewer(auto=True)
         self.admin_users = {
@@ -89,22 +158,54 @@ class JocastaBot(commands.Bot):
             "Zed42": "Zed"
         }
         self.project_data = {}
+        self.report_channels = {}
         self.nom_types = {}
         self.signatures = {}
         self.user_message_data = {}
+        self.data_revisions = {}
+
+        self.current_nominations = {k: set(v) for k, v in self.parse_json(NOM_FILE).items()}
+        self.current_reviews = {k: set(v) for k, v in self.parse_json(REVIEW_FILE).items()}
 
-        self.current_nominations = self.parse_json(NOM_FILE)
-        self.current_reviews = self.parse_json(REVIEW_FILE)
+        # The wiki work runs in worker threads, so these keep archives (which share the parent nomination pages,
+        # /History and the rankings table) and the nomination/review checks from overlapping with one another
+        self.archive_lock = asyncio.Lock()
+        self.nomination_lock = asyncio.Lock()
+        self.review_lock = asyncio.Lock()
+        self.written_hashes = {}
         # self.last_review_dates = self.parse_json(REVIEW_DATES_FILE)
 
         self.analysis_cache = {"CA": {}, "GA": {}, "FA": {}}
+        self.analysis_expiry = []
         self.noms_needing_votes = {}
+        self.title_parse_cache = OrderedDict()
 
+        self.user_id = None
+        self.mention_token = ""
+        self.nick_mention_token = ""
         self.report_dm = None
 
         self.counts = {"FA": 0, "GA": 0, "CA": 0}
         self.year = datetime.datetime.now().year
 
+        self.command_table = [
+            (self.is_reload_command, self.handle_reload_command),
+            (self.is_update_rankings_command, self.handle_update_rankings_command),
+            (self.is_word_count_category_command, self.handle_word_count_category_command),
+            (self.is_word_count_command, self.handle_word_count_command),
+            (self.is_analyze_command, self.handle_analyze_command),
+            (self.is_project_status_command, self.handle_project_status_command),
+            (self.is_talk_page_command, self.handle_talk_page_command),
+            (self.is_new_nomination_command, self.handle_new_nomination_command),
+            (self.is_check_nominations_command, self.check_for_new_nominations),
+            (self.is_check_nomination_objections_command, self.handle_check_nomination_objections_command),
+            (self.is_check_review_objections_command, self.handle_check_review_objections_command),
+            (self.is_create_review_command, self.handle_create_review_command),
+            (self.is_pass_review_command, self.handle_pass_review_command),
+            (self.is_probation_command, self.handle_probation_command),
+            (self.is_remove_status_command, self.handle_remove_status_command)
+        ]
+
     @staticmethod
     def parse_json(filename):
         try:
@@ -114,12 +215,27 @@ class JocastaBot(commands.Bot):
             error_log(f"Encountered error while parsing {filename}", e)
             return {}
 
+    def write_json(self, filename, data):
+        """ Writes to a temporary file and swaps it into place, so a crash mid-write can't corrupt the stored state.
+          Skips the write entirely if the data hasn't changed since the last write. """
+        data_hash = hash(json.dumps(data, sort_keys=True, default=sorted))
+        if self.written_hashes.get(filename) == data_hash:
+            return
+        tmp = f"{filename}.tmp"
+        with open(tmp, 'w', encoding='utf-8', buffering=65536) as f:
+            json.dump(data, f, indent=4, default=sorted)
+        os.replace(tmp, filename)
+        self.written_hashes[filename] = data_hash
+
     @property
     def site(self):
         return self.archiver.site
 
     async def on_ready(self):
         log(f'Jocasta on as {self.user}!')
+        self.user_id = self.user.id
+        self.mention_token = f"<@{self.user_id}>"
+        self.nick_mention_token = f"<@!{self.user_id}>"
 
         self.report_dm = await self.get_user(CADE).create_dm()
 
@@ -130,36 +246,35 @@ class JocastaBot(commands.Bot):
             error_log("No version found")
 
         site = pywikibot.Site(user="JocastaBot")
-        await self.reload_project_data(site)
-        await self.reload_nomination_data(site)
-        await self.reload_user_message_data(site)
-        await self.reload_signatures(site)
+        await asyncio.gather(self.reload_project_data(site), self.reload_nomination_data(site),
+                             self.reload_user_message_data(site), self.reload_signatures(site))
         log("Loading current nomination list")
         if not self.current_nominations:
-            self.current_nominations = load_current_nominations(site, self.nom_types)
+            self.current_nominations = await asyncio.to_thread(load_current_nominations, site, self.nom_types)
         if not self.current_reviews:
-            self.current_reviews = load_current_reviews(site, self.nom_types)
+            self.current_reviews = await asyncio.to_thread(load_current_reviews, site, self.nom_types)
 
-        for c in self.get_all_channels():
-            self.channels[c.name] = c
+        for g in self.guilds:
+            for c in g.text_channels:
+                self.channels[c.name] = c
 
         for e in self.emojis:
-            self.emoji_storage[e.name.lower()] = e.id
+            self.emoji_storage[e.name.lower()] = e
 
         try:
-            info = report_version_info(self.archiver.site, self.version)
+            info = await asyncio.to_thread(report_version_info, self.archiver.site, self.version)
             if info:
                 await self.text_channel("announcements").send(info)
         except Exception as e:
             error_log(type(e), e)
 
         page = pywikibot.Page(self.site, f"User:JocastaBot/Rankings/{datetime.datetime.now().year}")
-        counts = re.search("'+Total'+ ?\|+ ?([0-9]+) ?\|+ ?([0-9]+) ?\|+ ?([0-9]+)", page.get())
+        counts = RANKINGS_TOTAL_RE.search(await asyncio.to_thread(page.get))
         self.counts = {"FA": int(counts.group(1)), "GA": int(counts.group(2)), "CA": int(counts.group(3))}
-        print(self.counts)
+        log(f"Current rankings totals: {self.counts}")
 
         await self.run_analysis()
-        self.noms_needing_votes = self.determine_noms_needing_votes(True)
+        self.noms_needing_votes = await asyncio.to_thread(self.determine_noms_needing_votes, True)
 
         self.get_user_ids()
 
@@ -169,30 +284,59 @@ class JocastaBot(commands.Bot):
             self.post_to_twitter.start()
             self.ready = True
 
+    async def on_guild_channel_create(self, channel):
+        if isinstance(channel, TextChannel):
+            self.channels[channel.name] = channel
+
+    async def on_guild_channel_update(self, before, after):
+        if isinstance(after, TextChannel):
+            self.drop_cached_channel(before)
+            self.channels[after.name] = after
+
+    async def on_guild_channel_delete(self, channel):
+        self.drop_cached_channel(channel)
+
+    def drop_cached_channel(self, channel):
+        cached = self.channels.get(channel.name)
+        if cached and cached.id == channel.id:
+            self.channels.pop(channel.name)
+
+    async def on_guild_emojis_update(self, guild, before, after):
+        for e in before:
+            cached = self.emoji_storage.get(e.name.lower())
+            if cached and cached.id == e.id:
+                self.emoji_storage.pop(e.name.lower())
+        for e in after:
+            self.emoji_storage[e.name.lower()] = e
+
     # noinspection PyTypeChecker
     def text_channel(self, name) -> TextChannel:
         try:
             return self.channels[name]
         except KeyError:
-            return next(c for c in self.get_all_channels() if c.name == name)
+            return next(c for g in self.guilds for c in g.text_channels if c.name == name)
 
     def emoji_by_name(self, name):
-        if self.emoji_storage.get(name.lower()):
-            return self.get_emoji(self.emoji_storage[name.lower()])
-        return name
+        return self.emoji_storage.get(name.lower(), name)
 
     def is_mention(self, message: Message):
-        for mention in message.mentions:
-            if mention == self.user:
-                return True
-        return "@JocastaBot" in message.content or "<@&863310484517027861>" in message.content
+        content = message.content
+        if "@JocastaBot" in content or "<@&863310484517027861>" in content:
+            return True
+        elif message.reference is None and self.mention_token not in content and self.nick_mention_token not in content:
+            return False    # Only replies can mention the bot without its token appearing in the content
+        uid = self.user_id
+        return any(m.id == uid for m in message.mentions)
 
     async def find_nomination(self, nomination):
-        for message in await self.text_channel(NOM_CHANNEL).history(limit=25).flatten():
+        with_spaces = nomination.replace("_", " ")
+        with_underscores = nomination.replace(" ", "_")
+        async for message in self.text_channel(NOM_CHANNEL).history(limit=25):
             if message.author.id == MONITOR:
-                if re.search("New .*?(Featured|Good|Comprehensive) article nomination", message.content):
-                    log("Found: ", message.content)
-                if nomination in message.content.replace("_", " "):
+                content = message.content
+                if NEW_NOM_REPORT_RE.search(content):
+                    log("Found: ", content)
+                if with_spaces in content or with_underscores in content:
                     await self.handle_new_nomination_report(message)
                     return True
         return False
@@ -213,24 +357,6 @@ class JocastaBot(commands.Bot):
         except Exception:
             error_log(text, *args)
 
-    commands = {
-        "is_reload_command": "handle_reload_command",
-        "is_update_rankings_command": "handle_update_rankings_command",
-        "is_word_count_category_command": "handle_word_count_category_command",
-        "is_word_count_command": "handle_word_count_command",
-        "is_analyze_command": "handle_analyze_command",
-        "is_project_status_command":  "handle_project_status_command",
-        "is_talk_page_command": "handle_talk_page_command",
-        "is_new_nomination_command": "handle_new_nomination_command",
-        "is_check_nominations_command": "check_for_new_nominations",
-        "is_check_nomination_objections_command": "handle_check_nomination_objections_command",
-        "is_check_review_objections_command": "handle_check_review_objections_command",
-        "is_create_review_command": "handle_create_review_command",
-        "is_pass_review_command": "handle_pass_review_command",
-        "is_probation_command": "handle_probation_command",
-        "is_remove_status_command": "handle_remove_status_command"
-    }
-
     async def on_message(self, message: Message):
         # print(message.channel, message.content)
         if message.author == self.user:
@@ -254,16 +380,17 @@ class JocastaBot(commands.Bot):
         if "analyze sources" in message.content or "analyse sources" in message.content:
             return
 
-        match = re.search("add word count for (?P<status>(Featured|Good|Comprehensive))", message.content)
+        match = NOM_WORD_COUNT_RE.search(message.content)
         if match:
             self.handle_word_count_nom_category_command(match['status'])
             return
 
-        for identifier, handler in self.commands.items():
-            command_dict = getattr(self, identifier)(message)
-            if command_dict:
-                await getattr(self, handler)(message, command_dict)
-                return
+        if COMMAND_PREFILTER_RE.search(message.content):
+            for predicate, handler in self.command_table:
+                command_dict = predicate(message)
+                if command_dict:
+                    await handler(message, command_dict)
+                    return
 
         if message.reference is not None and not message.is_system():
             return
@@ -296,7 +423,7 @@ class JocastaBot(commands.Bot):
             await self.update_command_messages()
             return
 
-        m = re.search("check for nomination: (.*?)$", message.content)
+        m = CHECK_NOMINATION_RE.search(message.content)
         if m:
             result = await self.find_nomination(m.group(1))
             if result:
@@ -311,7 +438,7 @@ class JocastaBot(commands.Bot):
             await self.handle_project_status_command(message, project_command)
             return
 
-        match = re.search("add word count for (?P<status>(Featured|Good|Comprehensive))", message.content)
+        match = NOM_WORD_COUNT_RE.search(message.content)
         if match:
             self.handle_word_count_nom_category_command(match['status'])
             return
@@ -321,7 +448,7 @@ class JocastaBot(commands.Bot):
             await self.handle_word_count_command(message, cmd)
             return
 
-        match = re.search("message #(?P<channel>.*?): (?P<text>.*?)$", message.content)
+        match = MESSAGE_CHANNEL_RE.search(message.content)
         if match:
             channel = match.groupdict()['channel']
             text = match.groupdict()['text'].replace(":star:", "🌠")
@@ -387,25 +514,28 @@ class JocastaBot(commands.Bot):
         return {875035361070424107: "\n".join(text), 1070735568423632967: "\n".join(review_commands), 875035362395815946: "\n".join(related)}
 
     async def update_command_messages(self):
-        posts = self.list_commands()
-        pins = await self.text_channel(COMMANDS).pins()
-        target = None
-        for post in pins:
-            if post.id in posts:
-                await post.edit(content=posts[post.id])
-                if post.id == 875035361070424107:
-                    target = post
-
-        if target:
+        posts = self.command_messages.get(self.version)
+        if posts is None:
+            posts = self.list_commands()
+            self.command_messages = {self.version: posts}
+        pins = {post.id: post for post in await self.text_channel(COMMANDS).pins()}
+        edits = [pins[i].edit(content=content) for i, content in posts.items()
+                 if i in pins and pins[i].content != content]
+        await asyncio.gather(*edits)
+        target = pins.get(875035361070424107)
+
+        if target and edits:
             await target.reply("**Commands have been updated! Please view this channel's pinned messages for more info.**")
+        elif target:
+            await target.reply("**Commands are already up to date; nothing was changed.**")
 
     @staticmethod
     def is_reload_command(message: Message):
         return "reload data" in message.content
 
     async def handle_reload_command(self, message: Message, _):
-        success1 = await self.reload_project_data(self.archiver.site)
-        success2 = await self.reload_user_message_data(self.archiver.site)
+        success1, success2 = await asyncio.gather(self.reload_project_data(self.archiver.site),
+                                                  self.reload_user_message_data(self.archiver.site))
         if success1 or success2:
             await message.add_reaction(EXCLAMATION)
             await message.channel.send(success1)
@@ -418,21 +548,33 @@ class JocastaBot(commands.Bot):
     async def reload_data(self, site, data_type, page_name):
         log(f"Loading {data_type} data")
         page = pywikibot.Page(site, f"User:JocastaBot/{page_name}")
+        latest = await asyncio.to_thread(lambda: page.latest_revision_id)
+        if page_name in self.data_revisions and self.data_revisions[page_name][0] == latest:
+            log(f"No changes to {data_type} data since revision {latest}")
+            return self.data_revisions[page_name][1], False
+
         data = {}
         error, first = False, True
         editor = None
-        for rev in page.revisions(content=True, total=5):
-            try:
-                data = json.loads(rev.text)
-            except Exception as e:
-                await self.report_error(f"{data_type} data reload", None, type(e), e)
-                if first:
-                    error = True
-                    editor = rev['user']
-                    first = False
+        checked = 0
+        # the latest revision is almost always valid, so only fall back to older revisions if it isn't
+        for total in (1, 5):
+            revisions = await asyncio.to_thread(load_revisions, page, total)
+            for rev in revisions[checked:]:
+                try:
+                    data = json_loads(rev.text)
+                except Exception as e:
+                    await self.report_error(f"{data_type} data reload", None, type(e), e)
+                    if first:
+                        error = True
+                        editor = rev['user']
+                        first = False
+                if data:
+                    log(f"Loaded valid data from revision {rev.revid}")
+                    break
             if data:
-                log(f"Loaded valid data from revision {rev.revid}")
                 break
+            checked = len(revisions)
         if not data:
             if editor:
                 user_str = self.get_user_id(editor)
@@ -440,11 +582,14 @@ class JocastaBot(commands.Bot):
                        f" Please review your edit and fix any JSON errors."
                 await self.text_channel(COMMANDS).send(text)
             raise ArchiveException(f"Cannot load {data_type} data")
+        if not error:
+            self.data_revisions[page_name] = (latest, data)
         return data, error
 
     async def reload_project_data(self, site):
         data, error = await self.reload_data(site, "project", "Project Data")
         self.project_data = data
+        self.report_channels = {p: d["channel"] for p, d in data.items() if d.get("channel") and d.get("reportNoms")}
         self.archiver.project_archiver.reload_overlapping(self.project_data)
         return error
 
@@ -467,12 +612,13 @@ class JocastaBot(commands.Bot):
         
     @staticmethod
     def is_update_rankings_command(message: Message):
-        return "update rankings table" in message.content.lower()
+        return UPDATE_RANKINGS_RE.search(message.content) is not None
     
     async def handle_update_rankings_command(self, message: Message, _: dict):
         await message.add_reaction(TIMER)
         try:
-            update_rankings_table(self.archiver.site)
+            async with self.archive_lock:
+                await asyncio.to_thread(update_rankings_table, self.archiver.site)
             await message.remove_reaction(TIMER, self.user)
             await message.add_reaction(THUMBS_UP)
         except Exception as e:
@@ -482,13 +628,14 @@ class JocastaBot(commands.Bot):
 
     @staticmethod
     def is_word_count_command(message: Message):
-        match = re.search("(check )?(word count|count words)( for)?:? (?P<article>.*)", message.content)
+        if "word" not in message.content:
+            return None
+        match = WORD_COUNT_RE.search(message.content)
         return None if not match else match.groupdict()
 
     async def handle_word_count_command(self, message: Message, command: dict):
         if not command:
-            print(message.content, type(message.content))
-            match = re.search("<@[0-9]+> (?P<article>.*)", message.content)
+            match = MENTION_ARTICLE_RE.search(message.content)
             if not match:
                 command = match.groupdict()
             else:
@@ -516,7 +663,9 @@ class JocastaBot(commands.Bot):
 
     @staticmethod
     def is_word_count_category_command(message: Message):
-        match = re.search("check word count for (?P<status>([Ff]eatured|[Gg]ood|[Cc]omprehensive))( article)?(?P<nom> nominations)?", message.content)
+        if "check word count for " not in message.content:
+            return None
+        match = WORD_COUNT_CATEGORY_RE.search(message.content)
         return None if not match else match.groupdict()
 
     def handle_word_count_nom_category_command(self, status):
@@ -545,7 +694,7 @@ class JocastaBot(commands.Bot):
             for page in articles:
                 i += 1
                 if i % 50 == 0:
-                    print(i, page.title())
+                    log(f"{i}: {page.title()}")
                 if (i / total_articles) > ((s + 1) / 12):
                     try:
                         await message.add_reaction(CLOCKS[s + 1])
@@ -559,7 +708,7 @@ class JocastaBot(commands.Bot):
                     await message.remove_reaction(CLOCKS[s], self.user)
                     results = {}
                 pt = page.get()
-                if re.search("{{[CGF]Anom", pt):
+                if NOM_TEMPLATE_RE.search(pt):
                     continue
                 total, intro, body, bts = word_count(pt)
                 if validate_word_count(status, total, intro, body):
@@ -586,14 +735,17 @@ class JocastaBot(commands.Bot):
 
     @staticmethod
     def is_analyze_command(message: Message):
-        match = re.search("(run analysis on|analyze|compare) WP:(?P<nom_type>(FA|GA|CA))", message.content)
+        if "WP:" not in message.content:
+            return None
+        match = ANALYZE_RE.search(message.content)
         return None if not match else match.groupdict()
 
     async def handle_analyze_command(self, message: Message, command: dict):
         nom_data = self.nom_types[command["nom_type"]]
         try:
             await message.add_reaction(TIMER)
-            lines = build_analysis_response(self.archiver.site, nom_data.page, nom_data.category)
+            lines = await asyncio.to_thread(
+                build_analysis_response, self.archiver.site, nom_data.page, nom_data.category)
             await message.remove_reaction(TIMER, self.user)
             if lines:
                 await message.channel.send("\n".join(lines))
@@ -606,28 +758,30 @@ class JocastaBot(commands.Bot):
     async def run_analysis(self):
         channel = self.text_channel(COMMANDS)
 
-        for nom_type in self.analysis_cache.keys():
+        now = time.monotonic()
+        expired = {}
+        while self.analysis_expiry and self.analysis_expiry[0][0] <= now:
+            expiry, nom_type, article = heapq.heappop(self.analysis_expiry)
+            entry = self.analysis_cache[nom_type].get(article)
+            if not entry or entry[1] + self.ANALYSIS_CACHE_TTL != expiry:
+                continue    # Stale heap entry; the article was re-archived and has a later expiry queued
+            self.analysis_cache[nom_type].pop(article)
+            expired.setdefault(nom_type, set()).add(entry[0])
+
+        for nom_type, user_ids in expired.items():
             nom_data = self.nom_types[nom_type]
-            pop = []
-            user_ids = set()
-            now = datetime.datetime.now()
-            for article, (user_id, timestamp) in self.analysis_cache[nom_type].items():
-                if (now.timestamp() - timestamp) > (30 * 60):
-                    user_ids.add(user_id)
-                    pop.append(article)
-
-            if pop:
-                for a in pop:
-                    self.analysis_cache[nom_type].pop(a)
-                lines = build_analysis_response(self.archiver.site, nom_data.page, nom_data.category)
-                if lines:
-                    mentions = " ".join(f"<@{user_id}>" for user_id in list(user_ids))
-                    await channel.send(f"{mentions} Please check {self.nom_types[nom_type].page}; articles are missing.")
-                    await channel.send("\n".join(lines))
+            lines = await asyncio.to_thread(
+                build_analysis_response, self.archiver.site, nom_data.page, nom_data.category)
+            if lines:
+                mentions = " ".join(f"<@{user_id}>" for user_id in user_ids)
+                await channel.send(f"{mentions} Please check {nom_data.page}; articles are missing.")
+                await channel.send("\n".join(lines))
 
     @staticmethod
     def is_project_status_command(message: Message):
-        match = re.search("add (?P<nt>[CFG]A) to (?P<prj>WP:[A-z]+): (?P<article>.*?)( - Nom: (?P<nom>.*?))?$", message.content)
+        if "add " not in message.content or " to WP:" not in message.content:
+            return None
+        match = PROJECT_STATUS_RE.search(message.content)
         if match:
             return match.groupdict()
         return None
@@ -648,7 +802,9 @@ class JocastaBot(commands.Bot):
 
     @staticmethod
     def is_talk_page_command(message: Message):
-        match = re.search("leave (?P<nom_type>[CGF]AN) message for (?P<user>.*?) about (?P<article>.*?)(?P<x>with custom message: (?P<custom>.*?))?$", message.content)
+        if "leave " not in message.content or " message for " not in message.content:
+            return None
+        match = TALK_PAGE_RE.search(message.content)
         if match:
             return match.groupdict()
         return
@@ -666,6 +822,8 @@ class JocastaBot(commands.Bot):
     async def is_archive_command(self, message: Message):
         command = None
         try:
+            if "AN:" not in message.content:
+                raise UnknownCommand("Invalid command")
             command = ArchiveCommand.parse_command(message.content, message.author)
             command.requested_by = message.author.display_name
         except ArchiveException as e:
@@ -711,8 +869,8 @@ class JocastaBot(commands.Bot):
             accept_command = True
         elif command.post_mode and message.channel.name == SOCIAL_MEDIA:
             accept_command = True
-        elif message.channel.name == NOM_CHANNEL or message.channel.name == COMMANDS:
-            if any(r.name in ["AgriCorps", "EduCorps", "Inquisitorius"] for r in message.author.roles):
+        elif message.channel.name in ARCHIVE_CHANNELS:
+            if any(r.name in REVIEW_BOARD_ROLES for r in message.author.roles):
                 command.bypass = True
                 accept_command = True
             elif not command.success:
@@ -735,8 +893,10 @@ class JocastaBot(commands.Bot):
             else:  # Completed archival of successful nomination
                 self.successful_count += 1
                 self.counts[command.nom_type[:2]] += 1
-                self.analysis_cache[command.nom_type][command.article_name] = (message.author.id,
-                                                                               datetime.datetime.now().timestamp())
+                now = time.monotonic()
+                self.analysis_cache[command.nom_type][command.article_name] = (message.author.id, now)
+                heapq.heappush(self.analysis_expiry,
+                               (now + self.ANALYSIS_CACHE_TTL, command.nom_type, command.article_name))
                 status_message = self.build_message(archive_result, self.counts[command.nom_type[:2]])
                 await self.text_channel(NOM_CHANNEL).send(status_message)
 
@@ -745,18 +905,25 @@ class JocastaBot(commands.Bot):
                     await message.add_reaction(EXCLAMATION)
                     await message.channel.send(err_msg)
                 else:
-                    for emoji in (emojis or [THUMBS_UP]):
-                        try:
-                            await message.add_reaction(self.emoji_by_name(emoji))
-                        except HTTPException as e:
-                            await self.report_error(message.content, message.author, f"Emoji: {emoji}", e)
+                    emojis = emojis or [THUMBS_UP]
                     project_message = self.build_message(archive_result)
-                    for channel in (channels or []):
-                        await self.text_channel(channel).send(project_message)
+                    results = await asyncio.gather(
+                        *(message.add_reaction(self.emoji_by_name(emoji)) for emoji in emojis),
+                        *(self.text_channel(channel).send(project_message) for channel in (channels or [])),
+                        return_exceptions=True)
+                    for emoji, r in zip(emojis, results):
+                        if isinstance(r, HTTPException):
+                            await self.report_error(message.content, message.author, f"Emoji: {emoji}", r)
+                        elif isinstance(r, Exception):
+                            await self.report_error(message.content, message.author, type(r), r)
+                    for r in results[len(emojis):]:
+                        if isinstance(r, Exception):
+                            await self.report_error(message.content, message.author, type(r), r)
 
                 if self.successful_count >= 10:
                     try:
-                        update_rankings_table(self.archiver.site)
+                        async with self.archive_lock:
+                            await asyncio.to_thread(update_rankings_table, self.archiver.site)
                         self.successful_count = 0
                     except Exception as e:
                         await self.report_error(message.content, message.author, type(e), e)
@@ -764,7 +931,7 @@ class JocastaBot(commands.Bot):
     def build_message(self, result: ArchiveResult, count=None):
         icon = self.emoji_by_name(result.nom_type[:2])
         c = f" (#{count} of {self.year})" if count else ""
-        return f"{icon} New {self.nom_types[result.nom_type].full_name.capitalize()}{c}: [{result.page.title()}](<{result.page.full_url()}>)"
+        return f"{icon} New {self.nom_types[result.nom_type].headline}{c}: [{result.page.title()}](<{result.page.full_url()}>)"
 
     async def process_project_status_command(self, command: dict, author: str):
         result, err_msg = False, None
@@ -776,33 +943,34 @@ class JocastaBot(commands.Bot):
             elif command["nt"] not in ["FA", "GA", "CA"]:
                 return False, f"{command['nt']} is not a valid article type"
 
-            if "|" in command["article"]:
-                articles = [x.strip() for x in command["article"].split("|")]
-                response = self.archiver.project_archiver.add_multiple_articles_to_page(
+            articles = command["article"].split("|")
+            if len(articles) > 1:
+                articles = [x.strip() for x in articles]
+                response = await asyncio.to_thread(
+                    self.archiver.project_archiver.add_multiple_articles_to_page,
                     project=project, nom_type=command["nt"], articles=articles)
             else:
                 title = command['article']
                 nomination = None
                 if command.get('nom'):
                     nomination = command['nom']
-                elif "nomination)" in title:
-                    m = re.search("((.*?) \([A-z]+ nomination\))$", title)
-                    if not m:
+                else:
+                    m = NOMINATION_SUFFIX_RE.search(title)
+                    if m:
+                        title = m.group(2)
+                        nomination = m.group(1)
+                    elif "nomination)" in title:
                         raise ValueError(f"Cannot extract nomination title from {title}")
-                    title = m.group(2)
-                    nomination = m.group(1)
 
-                self.archiver.project_archiver.add_single_article_to_page(
+                await asyncio.to_thread(
+                    self.archiver.project_archiver.add_single_article_to_page,
                     project=project, article_title=title, nom_page_title=nomination, nom_type=command["nt"])
             result = True
         except ArchiveException as e:
             err_msg = e.message
             await self.report_error(command, author, e.message)
         except Exception as e:
-            try:
-                err_msg = str(e.args[0] if str(e.args).startswith('(') else e.args)
-            except Exception as _:
-                err_msg = str(e.args)
+            err_msg = extract_err_args(e)
             await self.report_error(command, author, type(e), e.args)
 
         if response:
@@ -815,10 +983,11 @@ class JocastaBot(commands.Bot):
     async def process_archive_command(self, text, command: ArchiveCommand) -> Tuple[bool, ArchiveResult, str]:
         result, err_msg = None, ""
         try:
-            if command.post_mode:
-                result = self.archiver.post_process(command)
-            else:
-                result = self.archiver.archive_process(command)
+            async with self.archive_lock:
+                if command.post_mode:
+                    result = await asyncio.to_thread(self.archiver.post_process, command)
+                else:
+                    result = await asyncio.to_thread(self.archiver.archive_process, command)
 
             if result and result.completed and result.successful:
                 info = result.to_info()
@@ -828,10 +997,7 @@ class JocastaBot(commands.Bot):
             err_msg = e.message
             await self.report_error(text, command.author, e.message)
         except Exception as e:
-            try:
-                err_msg = str(e.args[0] if str(e.args).startswith('(') else e.args)
-            except Exception as _:
-                err_msg = str(e.args)
+            err_msg = extract_err_args(e)
             await self.report_error(text, command.author, type(e), e, e.args)
 
         if not result:
@@ -846,7 +1012,8 @@ class JocastaBot(commands.Bot):
     async def process_talk_page_command(self, text, command: dict, requested_by):
         try:
             header = (command.get("custom_message") or "").strip() or command["article"]
-            self.archiver.leave_talk_page_message(
+            await asyncio.to_thread(
+                self.archiver.leave_talk_page_message,
                 header=header, article_name=command["article"], nom_type=command["nom_type"], nominator=command["user"],
                 archiver=requested_by)
             return True
@@ -857,16 +1024,15 @@ class JocastaBot(commands.Bot):
     async def handle_archive_followup(self, text, archive_result: ArchiveResult) -> Tuple[list, list, str]:
         results, channels, err_msg = None, [], ""
         try:
-            results, channels, counts = self.archiver.handle_successful_nomination(archive_result)
+            async with self.archive_lock:
+                results, channels, counts = await asyncio.to_thread(
+                    self.archiver.handle_successful_nomination, archive_result)
             self.counts = counts
         except ArchiveException as e:
             err_msg = e.message
             await self.report_error(text, None, e.message)
         except Exception as e:
-            try:
-                err_msg = str(e.args[0] if str(e.args).startswith('(') else e.args)
-            except Exception as _:
-                err_msg = str(e.args)
+            err_msg = extract_err_args(e)
             await self.report_error(text, None, type(e), e, e.args)
         return results, channels, err_msg
 
@@ -878,7 +1044,9 @@ class JocastaBot(commands.Bot):
 
     @staticmethod
     def is_create_review_command(message: Message):
-        match = re.search("[Cc]reate review (of|for) (?P<article>.*)", message.content)
+        if "review " not in message.content:
+            return None
+        match = CREATE_REVIEW_RE.search(message.content)
         if match:
             return match.groupdict()
         return None
@@ -888,12 +1056,10 @@ class JocastaBot(commands.Bot):
 
         await message.add_reaction(TIMER)
         try:
-            nom_type, result, user = self.reviewer.create_new_review_page(command['article'].strip(), message.author.display_name)
+            nom_type, result, user = await asyncio.to_thread(
+                self.reviewer.create_new_review_page, command['article'].strip(), message.author.display_name)
         except Exception as e:
-            try:
-                err_msg = str(e.args[0] if str(e.args).startswith('(') else e.args)
-            except Exception as _:
-                err_msg = str(e.args)
+            err_msg = extract_err_args(e)
             await self.report_error(message.content, message.author.display_name, type(e), e, e.args)
         await message.remove_reaction(TIMER, self.user)
 
@@ -901,14 +1067,17 @@ class JocastaBot(commands.Bot):
             await message.add_reaction(EXCLAMATION)
             await message.channel.send(err_msg or "UNKNOWN STATE: no result or error message")
         else:
-            self.current_reviews[nom_type].append(result.title())
+            async with self.review_lock:
+                self.current_reviews[nom_type].add(result.title())
             response = await self.build_review_report_message(nom_type, result)
             await self.text_channel(REVIEWS).send(response)
             await message.add_reaction(THUMBS_UP)
 
     @staticmethod
     def is_pass_review_command(message: Message):
-        match = re.search("[Mm]ark review (of|for) (?P<article>.*?) as passed", message.content)
+        if " as passed" not in message.content:
+            return None
+        match = PASS_REVIEW_RE.search(message.content)
         if match:
             return match.groupdict()
         return None
@@ -918,12 +1087,10 @@ class JocastaBot(commands.Bot):
 
         await message.add_reaction(TIMER)
         try:
-            status = self.reviewer.mark_review_as_complete(command['article'], "retry " in message.content)
+            status = await asyncio.to_thread(
+                self.reviewer.mark_review_as_complete, command['article'], "retry " in message.content)
         except Exception as e:
-            try:
-                err_msg = str(e.args[0] if str(e.args).startswith('(') else e.args)
-            except Exception as _:
-                err_msg = str(e.args)
+            err_msg = extract_err_args(e)
             await self.report_error(message.content, message.author.display_name, type(e), e, e.args)
         await message.remove_reaction(TIMER, self.user)
 
@@ -933,13 +1100,14 @@ class JocastaBot(commands.Bot):
         else:
             icon = self.emoji_by_name("GroguCheer")
             response = f"{icon} **{status} Article: {command['article']}** is no longer under review!"
-            print(response)
             await self.text_channel(REVIEWS).send(response)
             await message.add_reaction(THUMBS_UP)
 
     @staticmethod
     def is_probation_command(message: Message):
-        match = re.search("[Mm]ark review (of|for) (?P<article>.*?) as ((on )?probation|probed)", message.content)
+        if "review " not in message.content:
+            return None
+        match = PROBATION_RE.search(message.content)
         if match:
             return match.groupdict()
         return None
@@ -949,12 +1117,10 @@ class JocastaBot(commands.Bot):
 
         await message.add_reaction(TIMER)
         try:
-            status = self.reviewer.mark_article_as_on_probation(command['article'], "retry " in message.content)
+            status = await asyncio.to_thread(
+                self.reviewer.mark_article_as_on_probation, command['article'], "retry " in message.content)
         except Exception as e:
-            try:
-                err_msg = str(e.args[0] if str(e.args).startswith('(') else e.args)
-            except Exception as _:
-                err_msg = str(e.args)
+            err_msg = extract_err_args(e)
             await self.report_error(message.content, message.author.display_name, type(e), e, e.args)
         await message.remove_reaction(TIMER, self.user)
 
@@ -964,13 +1130,14 @@ class JocastaBot(commands.Bot):
         else:
             icon = self.emoji_by_name("Mtsorrow")
             response = f"{icon} {status} Article [**{command['article']}**](<{self.build_url(command['article'])}>) is now on probation"
-            print(response)
             await self.text_channel(REVIEWS).send(response)
             await message.add_reaction(THUMBS_UP)
 
     @staticmethod
     def is_remove_status_command(message: Message):
-        match = re.search("([Rr]emove|[Rr]evoke) status (of|for) (?P<article>.*)", message.content)
+        if " status " not in message.content:
+            return None
+        match = REMOVE_STATUS_RE.search(message.content)
         if match:
             return match.groupdict()
         return None
@@ -980,12 +1147,10 @@ class JocastaBot(commands.Bot):
 
         await message.add_reaction(TIMER)
         try:
-            status = self.reviewer.mark_article_as_former(command['article'], "retry " in message.content)
+            status = await asyncio.to_thread(
+                self.reviewer.mark_article_as_former, command['article'], "retry " in message.content)
         except Exception as e:
-            try:
-                err_msg = str(e.args[0] if str(e.args).startswith('(') else e.args)
-            except Exception as _:
-                err_msg = str(e.args)
+            err_msg = extract_err_args(e)
             await self.report_error(message.content, message.author.display_name, type(e), e, e.args)
         await message.remove_reaction(TIMER, self.user)
 
@@ -1002,7 +1167,9 @@ class JocastaBot(commands.Bot):
 
     @staticmethod
     def is_check_nomination_objections_command(message: Message):
-        match = re.search("check (for )?objections (on|for) (?P<nt>(FAN|GAN|CAN))(: (?P<page>.*?))?$", message.content)
+        if "objections " not in message.content:
+            return None
+        match = NOMINATION_OBJECTIONS_RE.search(message.content)
         if match:
             return match.groupdict()
         return None
@@ -1025,17 +1192,16 @@ class JocastaBot(commands.Bot):
         elif not normal and not overdue:
             await message.add_reaction(THUMBS_UP)
         else:
+            texts = []
             for url, lines in normal.items():
                 if lines:
-                    text = f"{nom_type}: [{self.extract_title(url)}](<{url}>)"
-                    for n, u in lines:
-                        text += f"\n- {u}: {n}"
-                    await message.channel.send(text)
-
+                    texts.append("\n".join([f"{nom_type}: [{self.extract_title(url)}](<{url}>)",
+                                            *(f"- {u}: {n}" for n, u in lines)]))
             for url, lines in overdue.items():
                 if lines:
-                    text = f"{nom_type}: [{self.extract_title(url)}](<{url}>)\n" + "\n".join(f"- {n}" for n in lines)
-                    await message.channel.send(text)
+                    texts.append(f"{nom_type}: [{self.extract_title(url)}](<{url}>)\n" + "\n".join(f"- {n}" for n in lines))
+            for text in pack_messages(texts):
+                await message.channel.send(text)
 
     async def handle_check_nomination_objections(self, nom_type):
         overdue, normal, err_msg = await self.process_check_objections(nom_type, None, False)
@@ -1048,28 +1214,34 @@ class JocastaBot(commands.Bot):
 
         if normal:
             user_ids = self.get_user_ids()
+            texts = []
             for url, lines in normal.items():
                 if lines:
-                    text = f"{nom_type}: [{self.extract_title(url)}](<{url}>)"
+                    text = [f"{nom_type}: [{self.extract_title(url)}](<{url}>)"]
                     for u, n in lines:
-                        user_str = self.get_user_id(u, user_ids)
-                        text += f"\n- {user_str}: {n}"
-                    await channel.send(text)
+                        text.append(f"- {self.get_user_id(u, user_ids)}: {n}")
+                    texts.append("\n".join(text))
+            for text in pack_messages(texts):
+                await channel.send(text)
 
         if overdue:
             review_channel = self.text_channel(self.nom_types[nom_type].channel)
 
+            texts = []
             for url, lines in overdue.items():
                 if lines:
-                    text = f"{nom_type}: [{self.extract_title(url)}](<{url}>)\n" + "\n".join(f"- {n}" for n in lines)
-                    log(f"Sending message to #{review_channel}:\n{text}")
-                    await review_channel.send(text)
+                    texts.append(f"{nom_type}: [{self.extract_title(url)}](<{url}>)\n" + "\n".join(f"- {n}" for n in lines))
+            for text in pack_messages(texts):
+                log(f"Sending message to #{review_channel}:\n{text}")
+                await review_channel.send(text)
 
     # Check Review Objections
 
     @staticmethod
     def is_check_review_objections_command(message: Message):
-        match = re.search("check (for )?objections (on|for) (?P<nt>(FA|GA|CA)) reviews?(: (?P<page>.*?))?$", message.content)
+        if "objections " not in message.content:
+            return None
+        match = REVIEW_OBJECTIONS_RE.search(message.content)
         if match:
             return match.groupdict()
         return None
@@ -1124,8 +1296,10 @@ class JocastaBot(commands.Bot):
     def get_user_ids(self):
         results = {}
         for user in self.text_channel(MAIN).guild.members:
-            results[user.name.lower()] = user.id
-            results[user.display_name.lower()] = user.id
+            uid = user.id
+            results[user.name.lower()] = uid
+            if user.display_name != user.name:
+                results[user.display_name.lower()] = uid
         return results
 
     def get_user_id(self, editor, user_ids=None):
@@ -1138,14 +1312,13 @@ class JocastaBot(commands.Bot):
         o, n, err_msg = {}, {}, ""
         try:
             if page_name:
-                o, n = check_for_objections_on_page(self.archiver.site, self.nom_types[nom_type], page_name)
+                o, n = await asyncio.to_thread(
+                    check_for_objections_on_page, self.archiver.site, self.nom_types[nom_type], page_name)
             else:
-                o, n = check_active_nominations(self.archiver.site, self.nom_types[nom_type], include)
+                o, n = await asyncio.to_thread(
+                    check_active_nominations, self.archiver.site, self.nom_types[nom_type], include)
         except Exception as e:
-            try:
-                err_msg = str(e.args[0] if str(e.args).startswith('(') else e.args)
-            except Exception as _:
-                err_msg = str(e.args)
+            err_msg = extract_err_args(e)
             await self.report_error(f"Objection check: {page_name}", None, type(e), e, e.args)
         return o, n, err_msg
 
@@ -1153,14 +1326,12 @@ class JocastaBot(commands.Bot):
         results, err_msg = {}, ""
         try:
             if page_name:
-                results = check_for_objections_on_review_page(self.archiver.site, self.nom_types[nom_type], page_name)
+                results = await asyncio.to_thread(
+                    check_for_objections_on_review_page, self.archiver.site, self.nom_types[nom_type], page_name)
             else:
-                results = check_active_reviews(self.archiver.site, self.nom_types[nom_type])
+                results = await asyncio.to_thread(check_active_reviews, self.archiver.site, self.nom_types[nom_type])
         except Exception as e:
-            try:
-                err_msg = str(e.args[0] if str(e.args).startswith('(') else e.args)
-            except Exception as _:
-                err_msg = str(e.args)
+            err_msg = extract_err_args(e)
             await self.report_error(f"Review objection check", None, type(e), e, e.args)
         return results, err_msg
 
@@ -1168,7 +1339,9 @@ class JocastaBot(commands.Bot):
 
     @staticmethod
     def is_new_nomination_command(message: Message):
-        match = re.search("new (?P<nt>[CFG]AN): (?P<article>.*?)(?P<suffix> \([A-z]+ nomination\))?$", message.content)
+        if "new " not in message.content or "AN: " not in message.content:
+            return None
+        match = NEW_NOM_COMMAND_RE.search(message.content)
         if match:
             return match.groupdict()
         return None
@@ -1186,110 +1359,122 @@ class JocastaBot(commands.Bot):
         if suffix:
             page_name += f" {suffix}"
         page = pywikibot.Page(self.archiver.site, page_name)
-        await self._handle_new_nomination(message, page)
+        async with self.nomination_lock:
+            await self._handle_new_nomination(message, page)
         await message.remove_reaction(TIMER, self.user)
 
     async def handle_new_nomination_report(self, message: Message):
-        match = re.search("wiki/(Wookieepedia:[A-z]+_article_nominations/.*)$", message.content)
+        match = NOM_LINK_RE.search(message.content) if "wiki/Wookieepedia:" in message.content else None
         if not match:
             await self.report_error(message.content, message.author, f"No match: {message.content}")
             return
         page_name = match.group(1)
         page = pywikibot.Page(self.archiver.site, page_name)
-        await self._handle_new_nomination(message, page)
+        async with self.nomination_lock:
+            await self._handle_new_nomination(message, page)
 
     async def check_for_new_nominations(self, _, __):
-        new_nominations = check_for_new_nominations(self.archiver.site, self.nom_types, self.current_nominations)
-        if not new_nominations:
-            return
+        async with self.nomination_lock:
+            new_nominations = await asyncio.to_thread(
+                check_for_new_nominations, self.archiver.site, self.nom_types, self.current_nominations)
+            if not new_nominations:
+                return
 
-        channel = self.text_channel(NOM_CHANNEL)
-        for nom_type, nominations in new_nominations.items():
-            for nomination in nominations:
-                log(f"Processing new {nom_type}: {nomination.title().split('/', 1)[1]}")
-                report = await self.build_nomination_report_message(nom_type, nomination)
-                if report:
-                    msg = await channel.send(report)
-                    await self._handle_new_nomination(msg, nomination)
+            channel = self.text_channel(NOM_CHANNEL)
+            for nom_type, nominations in new_nominations.items():
+                for nomination in nominations:
+                    log(f"Processing new {nom_type}: {nomination.title().split('/', 1)[1]}")
+                    report = await self.build_nomination_report_message(nom_type, nomination)
+                    if report:
+                        msg = await channel.send(report)
+                        await self._handle_new_nomination(msg, nomination)
 
-        with open(NOM_FILE, 'w') as f:
-            f.writelines(json.dumps(self.current_nominations, indent=4))
+            self.write_json(NOM_FILE, self.current_nominations)
 
     async def build_nomination_report_message(self, nom_type, nomination: pywikibot.Page):
-        nominator = None
-        for revision in nomination.revisions(total=1, reverse=True):
-            nominator = revision["user"]
+        nominator = await asyncio.to_thread(first_revision_user, nomination)
         if not nominator:
             await self.report_error(f"Nomination check for {nomination.title()}", None, f"Cannot identify nominator for page {nomination.title()}")
             return
         emoji = self.emoji_by_name(nom_type[:2])
         report = self.nom_types[nom_type].build_report_message(nomination, nominator)
-        return "{0} {1}".format(emoji, report)
+        return f"{emoji} {report}"
 
-    async def _handle_new_nomination(self, message: Message, page: pywikibot.Page):
-        try:
-            projects, flag = add_categories_to_nomination(page, self.archiver.project_archiver)
-        except EditConflictError:
-            projects, flag = add_categories_to_nomination(page, self.archiver.project_archiver)
+    @staticmethod
+    def with_retry(fn, *args):
+        """ Runs the given wiki edit, retrying once after a short pause if it hits an edit conflict. """
         try:
-            add_subpage_to_parent(page, self.archiver.site, "nomination")
+            return fn(*args)
         except EditConflictError:
-            add_subpage_to_parent(page, self.archiver.site, "nomination")
+            time.sleep(random.uniform(0.1, 0.3))
+            return fn(*args)
+
+    async def _handle_new_nomination(self, message: Message, page: pywikibot.Page):
+        projects, flag = await asyncio.to_thread(
+            self.with_retry, add_categories_to_nomination, page, self.archiver.project_archiver)
+        await asyncio.to_thread(self.with_retry, add_subpage_to_parent, page, self.archiver.site, "nomination")
 
         if flag:
-            try:
-                await message.add_reaction(self.emoji_by_name("point"))
-            except HTTPException:
-                pass
-            await message.add_reaction(EXCLAMATION)
-            await message.channel.send(f"Nomination violates word count requirements")
+            results = await asyncio.gather(
+                message.add_reaction(self.emoji_by_name("point")),
+                message.add_reaction(EXCLAMATION),
+                message.channel.send(f"Nomination violates word count requirements"),
+                return_exceptions=True)
+            for i, r in enumerate(results):
+                if isinstance(r, Exception) and not (i == 0 and isinstance(r, HTTPException)):
+                    await self.report_error(message.content, message.author, type(r), r)
 
         if projects:
+            sends, reactions, emojis = [], [], []
             for project in projects:
-                channel_name = self.project_data[project].get("channel")
-                report = self.project_data[project].get("reportNoms")
-                if channel_name and report:
-                    await self.text_channel(channel_name).send(message.content)
+                channel_name = self.report_channels.get(project)
+                if channel_name:
+                    sends.append(self.text_channel(channel_name).send(message.content))
                 emoji = self.archiver.project_archiver.emoji_for_project(project)
                 if emoji:
-                    try:
-                        await message.add_reaction(self.emoji_by_name(emoji))
-                    except HTTPException as e:
-                        if "error code: 10014" not in str(e):
-                            await self.report_error(message.content, message.author, f"Emoji: {emoji}", e)
+                    emojis.append(emoji)
+                    reactions.append(message.add_reaction(self.emoji_by_name(emoji)))
+
+            results = await asyncio.gather(*sends, *reactions, return_exceptions=True)
+            for r in results[:len(sends)]:
+                if isinstance(r, Exception):
+                    await self.report_error(message.content, message.author, type(r), r)
+            for emoji, r in zip(emojis, results[len(sends):]):
+                if isinstance(r, HTTPException) and "error code: 10014" not in str(r):
+                    await self.report_error(message.content, message.author, f"Emoji: {emoji}", r)
+                elif isinstance(r, Exception) and not isinstance(r, HTTPException):
+                    await self.report_error(message.content, message.author, type(r), r)
         else:
             await message.add_reaction(THUMBS_UP)
 
     # New Reviews
 
     async def check_for_new_reviews(self, _, __):
-        new_reviews = check_for_new_reviews(self.archiver.site, self.nom_types, self.current_reviews)
-        if not new_reviews:
-            return
+        async with self.review_lock:
+            new_reviews = await asyncio.to_thread(
+                check_for_new_reviews, self.archiver.site, self.nom_types, self.current_reviews)
+            if not new_reviews:
+                return
 
-        channel = self.text_channel(REVIEWS)
-        for nom_type, reviews in new_reviews.items():
-            for review in reviews:
-                log(f"Processing new {nom_type} review: {review.title().split('/', 1)[1]}")
-                report = await self.build_review_report_message(nom_type, review)
-                if report:
-                    await channel.send(report)
-                    await self._handle_new_review(review)
+            channel = self.text_channel(REVIEWS)
+            for nom_type, reviews in new_reviews.items():
+                for review in reviews:
+                    log(f"Processing new {nom_type} review: {review.title().split('/', 1)[1]}")
+                    report = await self.build_review_report_message(nom_type, review)
+                    if report:
+                        await channel.send(report)
+                        await self._handle_new_review(review)
 
-        with open(REVIEW_FILE, 'w') as f:
-            f.writelines(json.dumps(self.current_reviews, indent=4))
+            self.write_json(REVIEW_FILE, self.current_reviews)
 
     async def build_review_report_message(self, nom_type, review: pywikibot.Page, user=None):
         emoji = self.emoji_by_name("Sadme")
         user = self.get_user_id(user) if user else None
         report = self.nom_types[nom_type].build_review_message(review, user)
-        return "{0} {1}".format(emoji, report)
+        return f"{emoji} {report}"
 
     async def _handle_new_review(self, page: pywikibot.Page):
-        try:
-            add_subpage_to_parent(page, self.archiver.site, "review")
-        except EditConflictError:
-            add_subpage_to_parent(page, self.archiver.site, "review")
+        await asyncio.to_thread(self.with_retry, add_subpage_to_parent, page, self.archiver.site, "review")
 
     # Scheduled Tasks
 
@@ -1300,71 +1485,94 @@ class JocastaBot(commands.Bot):
             if not self.channels:
                 return
             elif self.archiver and self.archiver.project_archiver:
-                await self.check_for_new_nominations(None, None)
-                await self.check_for_new_reviews(None, None)
+                results = await asyncio.gather(
+                    self.check_for_new_nominations(None, None), self.check_for_new_reviews(None, None),
+                    return_exceptions=True)
+                for r in results:
+                    if isinstance(r, Exception):
+                        await self.report_error("Nomination check", None, type(r), r)
                 await self.report_noms_needing_votes()
         except Exception as e:
             await self.report_error("Nomination check", None, type(e), e)
 
+    def category_titles(self, name):
+        """ Returns the titles of the pages in the given category. """
+        return [p.title() for p in pywikibot.Category(self.site, name).articles()]
+
     def determine_noms_needing_votes(self, educorps):
-        results = {"inquisitorius": [], "agricorps": [], "educorps": []}
-        for page in pywikibot.Category(self.site, "Featured article nominations requiring one more Inq vote").articles():
-            results["inquisitorius"].append(page.title())
-        for page in pywikibot.Category(self.site, "Good article nominations requiring one more AC vote").articles():
-            results["agricorps"].append(page.title())
+        results = {"inquisitorius": set(), "agricorps": set(), "educorps": set()}
+        results["inquisitorius"].update(self.category_titles("Featured article nominations requiring one more Inq vote"))
+        results["agricorps"].update(self.category_titles("Good article nominations requiring one more AC vote"))
         if educorps:
-            for page in pywikibot.Category(self.site, "Comprehensive article nominations requiring one more EC vote").articles():
-                results["educorps"].append(page.title())
+            results["educorps"].update(self.category_titles("Comprehensive article nominations requiring one more EC vote"))
         return results
 
+    def parse_nomination_title(self, title):
+        """ Splits a nomination page title into its nomination type and subpage, along with its URL. """
+        result = self.title_parse_cache.get(title)
+        if result:
+            self.title_parse_cache.move_to_end(title)
+            return result
+        t, s = title.replace("Wookieepedia:", "").replace("nominations", "nomination").split("/", 1)
+        result = (t, s, self.build_url(title))
+        self.title_parse_cache[title] = result
+        if len(self.title_parse_cache) > TITLE_CACHE_SIZE:
+            self.title_parse_cache.popitem(last=False)
+        return result
+
     async def report_noms_needing_votes(self):
         now = datetime.datetime.now()
-        check_cans = now.hour % 8 == 0 and now.minute % 60 < 5
-        noms = self.determine_noms_needing_votes(check_cans)
+        hour, minute = now.hour, now.minute
+        check_cans = hour % 8 == 0 and minute % 60 < 5
+        noms = await asyncio.to_thread(self.determine_noms_needing_votes, check_cans)
         for channel, nx in noms.items():
             for n in nx:
-                if n not in (self.noms_needing_votes.get(channel) or []):
-                    t, s = n.replace("Wookieepedia:", "").replace("nominations", "nomination").split("/", 1)
-                    await self.text_channel(channel).send(f"{t} **[{s}](<{self.build_url(n)}>)** needs one more review board vote")
+                if n not in self.noms_needing_votes.get(channel, ()):
+                    t, s, url = self.parse_nomination_title(n)
+                    await self.text_channel(channel).send(f"{t} **[{s}](<{url}>)** needs one more review board vote")
 
         if not check_cans:
             noms["educorps"] = self.noms_needing_votes["educorps"]
         self.noms_needing_votes = noms
 
     def update_objection_schedule(self, val):
-        self.objection_schedule_count = val
-        with open(OBJECTION_SCHEDULE, "w") as f:
+        self.last_objection_check = val
+        with open(OBJECTION_SCHEDULE, "w", encoding="utf-8") as f:
             f.writelines(val)
 
-    @tasks.loop(minutes=20)
+    @tasks.loop(minutes=60)
     async def scheduled_check_for_objections(self):
         if not self.channels:
             return
-        if self.objection_schedule_count == "FAN":
-            if datetime.datetime.now().hour == 12:
-                self.update_objection_schedule("GAN")
-                await self.handle_check_nomination_objections("FAN")
-                await self.handle_check_review_objections("FA")
-        elif self.objection_schedule_count == "GAN":
-            self.update_objection_schedule("CAN")
-            await self.handle_check_nomination_objections("GAN")
-            await self.handle_check_review_objections("GA")
-        elif self.objection_schedule_count == "CAN":
-            self.update_objection_schedule("FAN")
-            await self.handle_check_nomination_objections("CAN")
-            await self.handle_check_review_objections("CA")
+        now = datetime.datetime.now()
+        today = now.date().isoformat()
+        if now.hour != 12 or self.last_objection_check == today:
+            return
+        self.update_objection_schedule(today)
+
+        limit = asyncio.Semaphore(OBJECTION_CHECK_CONCURRENCY)
+
+        async def check(nom_type):
+            async with limit:
+                await asyncio.gather(self.handle_check_nomination_objections(f"{nom_type}N"),
+                                     self.handle_check_review_objections(nom_type))
+
+        results = await asyncio.gather(*(check(nom_type) for nom_type in ("FA", "GA", "CA")), return_exceptions=True)
+        for r in results:
+            if isinstance(r, Exception):
+                await self.report_error("Objection check", None, type(r), r)
 
     @tasks.loop(minutes=60)
     async def scheduled_check_last_reviewed(self):
-        if datetime.datetime.now().hour != 12:
+        now = datetime.datetime.now()
+        if now.hour != 12:
             return
-        current_reviews = calculate_dates_for_board_members(self.site, self.last_review_dates)
-        today = datetime.datetime.now()
+        today = now.date()
+        current_reviews = await asyncio.to_thread(calculate_dates_for_board_members, self.site, self.last_review_dates)
         for board, members in current_reviews.items():
             for user, date_str in members.items():
                 if date_str:
-                    date = datetime.datetime.strptime(date_str, "%Y-%m-%d")
-                    diff = (today - date).days
+                    diff = (today - datetime.date.fromisoformat(date_str)).days
                     if diff >= 14 and diff % 2 == 0:
                         user_str = self.get_user_id(user)
                         await self.text_channel(board).send(f"{user_str}: it has been {diff} days since your last edit to a nomination")
@@ -1378,7 +1586,7 @@ class JocastaBot(commands.Bot):
             return
         elif self.archiver:
             if self.refresh == 2:
-                self.archiver.reload_site()
+                await asyncio.to_thread(self.archiver.reload_site)
                 self.refresh = 0
             else:
                 self.refresh += 1
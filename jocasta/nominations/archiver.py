@@ -1,7 +1,9 @@
 import datetime
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 from pywikibot import Page, Site, showDiff, input_choice, Category
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 import json
 import re
 import time
@@ -11,10 +13,32 @@ from jocasta.common import ArchiveException, calculate_nominated_revision, calcu
 from jocasta.data.filenames import *
 from jocasta.nominations.data import ArchiveCommand, ArchiveResult, NominationType, build_nom_types
 from jocasta.nominations.project_archiver import ProjectArchiver
-from jocasta.nominations.processor import remove_subpage_from_parent
+from jocasta.nominations.processor import preload_text, remove_subpage_from_parent
 from jocasta.nominations.rankings import update_current_year_rankings
 from jocasta.nominations.talk_page import build_history_text, build_talk_page
 
+ARCHIVE_EDIT_WORKERS = 3
+SIGNATURE_DATE = r"[0-9]+:[0-9]+, [0-9]+ [A-z]+ 20[0-9]{2}"
+NOMINATED_BY_USER_RE = re.compile(r"Nominated by.*?(\[\[User:|\{\{U\|)(.*?)[\|\]\}]")
+NOMINATED_BY_DATE_RE = re.compile(r"Nominated by.*?" + SIGNATURE_DATE)
+APPROVED_TEMPLATE_RE = re.compile(r"{{(AC|Inq|EC)approved\|")
+APPROVED_WITH_USER_RE = re.compile(r"{{(AC|Inq|EC)approved\|.*?(\[\[User:|\{\{U\|)")
+APPROVED_USER_STRIP_RE = re.compile(r"({{(AC|Inq|EC)approved\|).*?(\[\[User:|\{\{U\|).*? (" + SIGNATURE_DATE + r".*?}})")
+VOTE_LINE_RE = re.compile(r"^[ \t]*(#.*?)[ \t]*$", re.MULTILINE)
+VOTE_USER_RE = re.compile(r"(\[\[[Uu]ser:|\{\{[Uu]\|)")
+VOTE_DATE_RE = re.compile(SIGNATURE_DATE)
+VOTES_TEMPLATE_RE = re.compile(r"(\{\{[FGC][AT]Nvotes\|.*?)\}\}")
+VIOLATION_CATEGORY_LINK = "[[Category:Status article nominations that violate the word count requirement]]"
+TOP_STATUS_RE = re.compile(r"{{[Tt]op.*?\|([cgf]a)[|}]")
+TOP_STATUS_REMOVE_RE = re.compile(r"({{[Tt]op.*?)\|f?[cgf]a([|}])")
+TOP_TEMPLATE_RE = re.compile(r"{{[Tt]op([|\}])")
+
+
+@lru_cache(maxsize=None)
+def nomination_template_re(nom_type: str) -> re.Pattern:
+    """ Returns the compiled pattern matching the line containing the given type's nomination template. """
+    return re.compile("{{" + nom_type + r"nom[|}].*?\n")
+
 
 # noinspection RegExpRedundantEscape
 class Archiver:
@@ -106,22 +130,30 @@ class Archiver:
         - Updates the article's talk page with the revision data for the {{Ahh}} template
         - Updates the overall nomination history table with the nomination.
         """
-        page = Page(self.site, command.article_name)
+        site = self.site
+        nom_data = self.nom_types[command.nom_type]
+        nom_page_name = self.calculate_nomination_page_name(command)
+        page = Page(site, command.article_name)
+        nom_page = Page(site, nom_page_name)
+        talk_page = Page(site, f"{self.talk_ns}:{command.article_name}")
+
+        # Load the nomination's own pages in one batched query, rather than a separate round trip as each step first
+        # touches them. The shared /History page is read just before it's edited, to keep the edit-conflict window short.
+        preload_text([page, nom_page, talk_page])
+
         if not page.exists():
             return ArchiveResult(False, command, f"Target: {command.article_name} does not exist")
-
-        nom_page_name = self.calculate_nomination_page_name(command)
-        nom_page = Page(self.site, nom_page_name)
         if not nom_page.exists():
             return ArchiveResult(False, command, f"{nom_page_name} does not exist")
 
-        talk_page = Page(self.site, f"{self.talk_ns}:{command.article_name}")
-
         try:
+            self.check_for_redirect_pages(page=page, nom_page=nom_page, talk_page=talk_page)
+            nom_text = nom_page.get()
+
             # Checks for the appropriate Approved template on successful nominations, and rejects users from withdrawing
             # nominations other than their own
             if command.success:
-                self.check_approval_and_fields(nom_page, self.nom_types[command.nom_type])
+                self.check_approval_and_fields(nom_page, nom_data, nom_text)
             elif not command.bypass:
                 nom_revision = calculate_nominated_revision(page=page, nom_type=command.nom_type)
                 if self.are_users_different(nom_revision['user'], command.requested_by):
@@ -129,15 +161,13 @@ class Archiver:
                                            f"was nominated by {nom_revision['user']}")
             projects = self.project_archiver.identify_project_from_nom_page(nom_page)
 
-            self.check_for_redirect_pages(page=page, nom_page=nom_page, talk_page=talk_page)
-
             total, intro, body, bts = word_count(page.get())
             word_count_text = f"{total} words ({intro} introduction, {body} body, {bts} behind the scenes)"
 
             # Remove nomination subpage from nomination page
             log(f"Removing nomination from parent page")
             remove_subpage_from_parent(
-                site=self.site, parent_title=self.nom_types[command.nom_type].nomination_page, retry=command.retry,
+                site=site, parent_title=nom_data.nomination_page, retry=command.retry,
                 subpage=f"{command.article_name}{command.suffix}", withdrawn=command.withdrawn)
 
             # Remove nomination template from the article itself (and add status if necessary)
@@ -155,25 +185,45 @@ class Archiver:
             # Calculate the revision IDs for the nomination
             completed, nominated = calculate_revisions(page=page, template=f"{command.nom_type}nom", comment=comment)
 
-            # Apply archive template to nomination subpage
-            log(f"Archiving {nom_page_name}")
-            self.archive_nomination_page(
-                retry=command.retry, nom_page=nom_page, nom_type=command.nom_type, successful=command.success,
-                withdrawn=command.withdrawn, nominator=nominated["user"], word_count_text=word_count_text)
-            time.sleep(1)
-
-            # Create or update the talk page with the {Ahm} status templates
-            log("Updating talk page with status history")
-            self.update_talk_page(
+            # Build the archived nomination page and talk page up front, so that a page that can't be updated stops the
+            # archive before any of the edits below are submitted
+            archived_text = self.build_archived_nomination_text(
+                retry=command.retry, nom_page=nom_page, text=nom_text, nom_type=command.nom_type,
+                successful=command.success, withdrawn=command.withdrawn, nominator=nominated["user"],
+                word_count_text=word_count_text)
+            talk_text, new_talk_text, talk_comment = self.build_talk_page_update(
                 talk_page=talk_page, nom_type=command.nom_type, nom_page_name=nom_page_name, successful=command.success,
                 nominated=nominated, completed=completed, projects=projects, withdrawn=command.withdrawn)
-            time.sleep(1)
 
-            # Update nomination history
-            log("Updating nomination history table")
-            self.update_nomination_history(
-                nom_type=command.nom_type, page=page, nom_page_name=nom_page_name, successful=command.success,
-                nominated_revision=nominated, completed_revision=completed, withdrawn=command.withdrawn)
+            # The nomination page, talk page and history edits only depend on the revisions above, so they're made
+            # side-by-side; pywikibot's put throttle still spaces out the saves themselves. Interactive runs keep them
+            # sequential so the diff prompts don't interleave.
+            with ThreadPoolExecutor(max_workers=ARCHIVE_EDIT_WORKERS if self.auto else 1) as executor:
+                futures = []
+
+                # Apply archive template to nomination subpage
+                if archived_text:
+                    log(f"Archiving {nom_page_name}")
+                    futures.append(executor.submit(
+                        self.archive_nomination_page, nom_page=nom_page, text=nom_text, new_text=archived_text,
+                        successful=command.success, withdrawn=command.withdrawn, nominator=nominated["user"]))
+
+                # Create or update the talk page with the {Ahm} status templates
+                log("Updating talk page with status history")
+                futures.append(executor.submit(
+                    self.update_talk_page, talk_page=talk_page, text=talk_text, new_text=new_talk_text,
+                    comment=talk_comment))
+
+                # Update nomination history
+                log("Updating nomination history table")
+                futures.append(executor.submit(
+                    self.update_nomination_history, nom_type=command.nom_type, page=page, nom_page_name=nom_page_name,
+                    successful=command.success, nominated_revision=nominated, completed_revision=completed,
+                    withdrawn=command.withdrawn, retry=command.retry))
+
+            # Re-raise the first failure, so that ArchiveExceptions are reported the same way as before
+            for future in futures:
+                future.result()
 
             # For successful nominations, leave a talk page message, and removes upgraded articles from their old page
             if command.success:
@@ -235,14 +285,13 @@ class Archiver:
         # noinspection PyTypeChecker
         return None, None
 
-    def check_approval_and_fields(self, nom_page, nom_data: NominationType):
-        text = nom_page.get()
-        u = re.search("Nominated by.*?(\[\[User:|\{\{U\|)(.*?)[\|\]\}]", text)
+    def check_approval_and_fields(self, nom_page, nom_data: NominationType, text: str):
+        u = NOMINATED_BY_USER_RE.search(text)
         if not u:
             raise ArchiveException("Nominated by field lacks a link to nominator's userpage")
-        elif not re.search("Nominated by.*?[0-9]+:[0-9]+, [0-9]+ [A-z]+ 20[0-9]{2}", text):
+        elif not NOMINATED_BY_DATE_RE.search(text):
             raise ArchiveException("Nominated by field lacks nomination date")
-        elif not re.search("{{(AC|Inq|EC)approved\|", text):
+        elif not APPROVED_TEMPLATE_RE.search(text):
             raise ArchiveException("Nomination page lacks the approved template")
         # elif "Category:Nominations by User:" not in text:
         #     nominator = u.group(2)
@@ -253,19 +302,19 @@ class Archiver:
         #     sort_text = build_sub_page_name(nom_page.title())
         #     text = text.replace(ni, f"[[Category:Nominations by User:{nominator}|{sort_text}]]{ni}")
 
-        if re.search("{{(AC|Inq|EC)approved\|.*?(\[\[User:|\{\{U\|)", text):
-            text = re.sub("({{(AC|Inq|EC)approved\|).*?(\[\[User:|\{\{U\|).*? ([0-9]+:[0-9]+, [0-9]+ [A-z]+ 20[0-9]{2}.*?}})",
-                          r"\1\4", text)
-        if re.search("{{(AC|Inq|EC)approved\|.*?(\[\[User:|\{\{U\|)", text):
+        if APPROVED_WITH_USER_RE.search(text):
+            text = APPROVED_USER_STRIP_RE.sub(r"\1\4", text)
+        if APPROVED_WITH_USER_RE.search(text):
             raise ArchiveException("Approval template contains username, and was unable to remove it")
 
-        first_revision = list(nom_page.revisions(total=1, reverse=True))[0]
+        first_revision = nom_page.oldest_revision
         diff = datetime.datetime.now() + datetime.timedelta(hours=self.timezone_offset + 2) - first_revision['timestamp']
         if diff.days < 2:
             raise ArchiveException(f"Nomination is only {diff.days} days old, cannot pass yet.")
 
+        # Check the nomination's own categories, rather than listing every page in the (much larger) votes category
         category = Category(self.site, nom_data.votes_category)
-        if not any(nom_page.title() == p.title() for p in category.articles()):
+        if category not in nom_page.categories():
             raise ArchiveException("Nomination page lacks the number of sufficient votes")
 
         if diff.days >= 7:
@@ -275,7 +324,7 @@ class Archiver:
         text_to_search = text_to_search.split("====object====")[0]
 
         found = text_to_search.count(nom_data.template)
-        votes = [vl.strip() for vl in text_to_search.splitlines() if vl.strip().startswith("#")]
+        votes = VOTE_LINE_RE.findall(text_to_search)
         inq_votes = 0 if nom_data.nom_type == "FAN" else text_to_search.count("{{inq}}")
         user_votes = len(votes) - found - inq_votes
 
@@ -284,9 +333,9 @@ class Archiver:
         missing_user = 0
         missing_date = 0
         for vote in votes:
-            if not re.search("(\[\[[Uu]ser:|\{\{[Uu]\|)", vote):
+            if not VOTE_USER_RE.search(vote):
                 missing_user += 1
-            elif not re.search("[0-9]+:[0-9]+, [0-9]+ [A-z]+ 20[0-9]{2}", vote):
+            elif not VOTE_DATE_RE.search(vote):
                 missing_date += 1
 
         if missing_date and missing_user:
@@ -317,27 +366,28 @@ class Archiver:
             raise ArchiveException(f"Nomination only has {found} review board votes and {user_votes} user votes,"
                                    f" cannot pass yet")
 
-    def archive_nomination_page(self, *, nom_page: Page, nom_type: str, successful: bool, retry: bool,
-                                withdrawn: bool, nominator: str, word_count_text: str):
-        """ Applies the {nom_type}_archive template to the nomination page. """
-
-        if nom_page.isRedirectPage():
-            raise ArchiveException(f"{nom_page.title()} is a redirect page")
-        text = nom_page.get()
+    @staticmethod
+    def determine_archive_result(successful: bool, withdrawn: bool) -> str:
         if successful:
-            result = "successful"
+            return "successful"
         elif withdrawn:
-            result = "withdrawn"
-        else:
-            result = "unsuccessful"
+            return "withdrawn"
+        return "unsuccessful"
 
-        lines = text.splitlines()
+    def build_archived_nomination_text(self, *, nom_page: Page, text: str, nom_type: str, successful: bool, retry: bool,
+                                       withdrawn: bool, nominator: str, word_count_text: str) -> Optional[str]:
+        """ Builds the nomination page's text with the {nom_type}_archive template applied, without saving it. Returns
+          None if the nomination was already archived on a retry, and raises an ArchiveException if the nomination page
+          can't be archived. """
+
+        result = self.determine_archive_result(successful, withdrawn)
         new_lines = [f"{{{{subst:{nom_type} archive|{result}}}}}"]
         found = False
         dnw_found = False
-        for line in lines:
+        nom_category = self.nom_types[nom_type].nomination_category
+        for line in text.splitlines():
             if "ANvotes|" in line:
-                new_lines.append(re.sub("(\{\{[FGC][AT]Nvotes\|.*?)\}\}", "\\1|1}}", line))
+                new_lines.append(VOTES_TEMPLATE_RE.sub(r"\1|1}}", line))
             elif "Nomination comments" in line:
                 new_lines.append(line)
                 new_lines.append("*'''Date Archived''': ~~~~~")
@@ -345,40 +395,45 @@ class Archiver:
             elif line == "<!-- DO NOT WRITE BELOW THIS LINE! -->":
                 dnw_found = True
             elif dnw_found:
-                if not found and self.nom_types[nom_type].nomination_category in line:
+                if not found and nom_category in line:
                     found = True
-            elif not found and self.nom_types[nom_type].nomination_category in line:
+            elif not found and nom_category in line:
                 found = True
-            elif "[[Category:Status article nominations that violate the word count requirement]]" in line and "nowiki" not in line:
+            elif VIOLATION_CATEGORY_LINK in line and "nowiki" not in line:
                 new_lines.append(f"<nowiki>{line}</nowiki>")
             else:
                 new_lines.append(line)
 
-        category_name = f"Category:Archived nominations by User:{nominator}"
-        category = Page(self.site, category_name)
-        if not category.exists():
-            category.put("Archived nominations by {{U|" + nominator + "}}\n\n__EXPECTUNUSEDCATEGORY__\n[[Category:Archived nominations by user|"
-                         + nominator + "]]", "Creating new nomination category")
+        if not found:
+            if retry:
+                log("Nomination already archived, bypassing due to retry")
+                return None
+            raise ArchiveException("Cannot find category in nomination page")
 
         sort_text = build_sub_page_name(nom_page.title())
         if not successful:
             sort_text = f" {sort_text}"
-        new_lines.append(f"[[{category_name}|{sort_text}]]")
+        new_lines.append(f"[[Category:Archived nominations by User:{nominator}|{sort_text}]]")
         new_lines.append("</div>")
+        return "\n".join(new_lines)
 
-        new_text = "\n".join(new_lines)
-        if not found:
-            if retry:
-                log("Nomination already archived, bypassing due to retry")
-                return
-            raise ArchiveException(f"Cannot find category in nomination page")
+    def archive_nomination_page(self, *, nom_page: Page, text: str, new_text: str, successful: bool, withdrawn: bool,
+                                nominator: str):
+        """ Saves the archived nomination page built by build_archived_nomination_text, creating the nominator's
+          archived nominations category if necessary. """
+
+        category = Page(self.site, f"Category:Archived nominations by User:{nominator}")
+        if not category.exists():
+            category.put("Archived nominations by {{U|" + nominator + "}}\n\n__EXPECTUNUSEDCATEGORY__\n[[Category:Archived nominations by user|"
+                         + nominator + "]]", "Creating new nomination category")
 
         self.input_prompts(text, new_text)
 
+        result = self.determine_archive_result(successful, withdrawn)
         nom_page.put(new_text, f"Archiving {result} nomination")
 
     def update_nomination_history(self, nom_type, successful: bool, page: Page, nom_page_name,
-                                  nominated_revision: dict, completed_revision: dict, withdrawn: bool):
+                                  nominated_revision: dict, completed_revision: dict, withdrawn: bool, retry: bool):
         """ Updates the nomination /History page with the nomination's information. """
 
         if successful:
@@ -393,11 +448,14 @@ class Archiver:
         end_date = completed_revision['timestamp'].strftime('%Y/%m/%d')
         user = "{{U|" + nominated_revision['user'] + "}}"
 
-        new_row = f"|-\n| {formatted_link} || {nom_date} || {end_date} || {user} || [[{nom_page_name} | {result}]]"
+        row = f"| {formatted_link} || {nom_date} || {end_date} || {user} || [[{nom_page_name} | {result}]]"
 
         history_page = Page(self.site, self.nom_types[nom_type].nomination_page + "/History")
         text = history_page.get()
-        new_text = text.replace("|}", new_row + "\n|}")
+        if retry and row in text.splitlines():
+            log("Nomination already listed in history table, bypassing due to retry")
+            return
+        new_text = text.replace("|}", f"|-\n{row}\n|}}")
 
         self.input_prompts(text, new_text)
 
@@ -413,17 +471,17 @@ class Archiver:
         
         former_status = None
         if successful:
-            match = re.search("{{[Tt]op.*?\|([cgf]a)[|}]", text)
+            match = TOP_STATUS_RE.search(text)
             if match:
                 former_status = match.group(1)
 
-            text1 = re.sub("({{[Tt]op.*?)\|f?[cgf]a([|}])", "\\1\\2", text)
-            text2 = re.sub("{{[Tt]op([|\}])", f"{{{{Top|{nom_type.lower()}\\1", text1)
+            text1 = TOP_STATUS_REMOVE_RE.sub(r"\1\2", text)
+            text2 = TOP_TEMPLATE_RE.sub(f"{{{{Top|{nom_type.lower()}\\1", text1)
             if text1 == text2:
                 raise ArchiveException("Could not add status to {{Top}} template")
         else:
             text2 = text
-        text3 = re.sub("{{" + nom_type + "nom[|}].*?\n", "", text2)
+        text3 = nomination_template_re(nom_type).sub("", text2)
         if text2 == text3:
             if retry:
                 log("Nomination already archived, bypassing due to retry")
@@ -436,18 +494,21 @@ class Archiver:
 
         return former_status
 
-    def update_talk_page(self, *, talk_page: Page, nom_type: str, successful: bool, withdrawn: bool,
-                         nom_page_name: str, nominated: dict, completed: dict, projects: list):
-        """ Updates the talk page of the target article with the appropriate {{Ahm}} templates, and updates the {{Ahf}}
-          status. Also adds a {{Talkheader}} template if necessary. """
+    def build_talk_page_update(self, *, talk_page: Page, nom_type: str, successful: bool, withdrawn: bool,
+                               nom_page_name: str, nominated: dict, completed: dict, projects: list) -> Tuple[str, str, str]:
+        """ Builds the talk page of the target article with the appropriate {{Ahm}} templates and the updated {{Ahf}}
+          status, plus a {{Talkheader}} template if necessary. Returns the old text, new text and edit summary. """
 
         nom_type = "CA" if nom_type == "JA" else nom_type
         result = "Success" if successful else ("Withdrawn" if withdrawn else "Failure")
         history_text = build_history_text(nom_type=nom_type, result=result, link=nom_page_name,
                                           start=nominated, completed=completed)
 
-        text, new_text, comment = build_talk_page(talk_page=talk_page, nom_type=nom_type, history_text=history_text,
-                                                  successful=successful, project_data=self.project_data, projects=projects)
+        return build_talk_page(talk_page=talk_page, nom_type=nom_type, history_text=history_text,
+                               successful=successful, project_data=self.project_data, projects=projects)
+
+    def update_talk_page(self, *, talk_page: Page, text: str, new_text: str, comment: str):
+        """ Saves the talk page update built by build_talk_page_update. """
 
         self.input_prompts(text, new_text)
         talk_page.put(new_text, comment)
@@ -473,35 +534,32 @@ class Archiver:
             return
 
         text = page.get()
+        exact_link = f"[[{article}]]"
+        piped_link = f"[[{article}|"
         lines = []
         for line in text.splitlines():
-            if line.count("[[") > 1 and (f"[[{article}]]" in line or f"[[{article}|" in line):
+            if exact_link not in line and piped_link not in line:
+                lines.append(line)
+            elif line.count("[[") > 1:
                 error_log(f"Unable to remove article, page is in an unexpected state: {line}")
                 return
-            elif f"[[{article}]]" in line:
-                pass
-            elif f"[[{article}|" in line:
-                pass
-            else:
-                lines.append(line)
 
         new_text = "\n".join(lines)
         page.put(new_text, f"Removing newly-promoted {article}")
 
     def determine_signature(self, user):
-        if user in self.signatures:
-            return self.signatures[user]
+        signature = self.signatures.get(user)
+        if signature:
+            return signature
         log(f"No signature found for user {user}! Signature may be invalid")
         return "{{U|" + user + "}}"
 
     def leave_talk_page_message(self, header: str, nom_type: str, article_name: str, nominator: str, archiver: str):
         """ Leaves a talk page message about a successful article nomination on the nominator's talk page. """
 
-        log(nominator, nom_type, self.user_message_data)
-        if nominator in self.user_message_data:
-            if nom_type in self.user_message_data[nominator]:
-                log(f"Bypassing {nom_type} talk page message notification for user {nominator}")
-                return
+        if nom_type in self.user_message_data.get(nominator, ()):
+            log(f"Bypassing {nom_type} talk page message notification for user {nominator}")
+            return
 
         talk_page = Page(self.site, f"User talk:{nominator}")
         if not talk_page.exists():
@@ -512,6 +570,5 @@ class Archiver:
 
         new_text = f"=={header}=="
         new_text += "\n{{subst:" + nom_type[:2] + " notify|1=" + article_name + "|2=" + signature + " ~~~~~}}"
-        print(new_text)
 
         talk_page.put(talk_page.get() + "\n\n" + new_text, f"Notifying user about new {nom_type}: {article_name}")
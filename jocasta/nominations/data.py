@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Dict
 from pywikibot import Page
 from typing import List
@@ -6,6 +7,9 @@ import re
 from jocasta.common import ArchiveException, UnknownCommand, clean_text
 from jocasta.nominations.rankings import blacklisted
 
+URL_TRANSLATION = str.maketrans(" ", "_")
+ARCHIVE_COMMAND_RE = re.compile(r"(?P<result>([Ss]uc(c)?es(s)?ful|[Uu]nsuc(c)?es(s)?ful|[Ff]ailed|[Ww]ithdrawn?|[Tt]est|[Pp]ost)) (?P<ntype>[CGFJ]A)N: ?(?P<article>.*?)(?P<suffix> \([A-z]+ nomination\))?(?P<no_msg> \(no message\))?(, | \()?(?P<custom>custom message: .*?\)?)?$")
+
 
 class ArticleInfo:
     def __init__(self, title: str, page_url: str, nom_type: str, nominator: str, projects: List[str] = None):
@@ -63,48 +67,55 @@ class ArchiveCommand:
     def parse_command(command: str, author: str):
         """ Parses the nomination type, result, article name and optional suffix from the given command. """
 
-        match = re.search("(?P<result>([Ss]uc(c)?es(s)?ful|[Uu]nsuc(c)?es(s)?ful|[Ff]ailed|[Ww]ithdrawn?|[Tt]est|[Pp]ost)) (?P<ntype>[CGFJ]A)N: ?(?P<article>.*?)(?P<suffix> \([A-z]+ nomination\))?(?P<no_msg> \(no message\))?(, | \()?(?P<custom>custom message: .*?\)?)?$",
-                          command.strip().replace('\\n', ''))
-        if not match:
-            raise UnknownCommand("Invalid command")
-
-        result_str = clean_text(match.groupdict().get('result')).lower()
-        test_mode, post_mode, withdrawn = False, False, False
-        if result_str in ["successful", "succesful", "sucessful", "sucesful"]:
-            successful = True
-        elif result_str in ["unsuccessful", "unsuccesful", "unsucessful", "unsucesful", "failed"]:
-            successful = False
-        elif result_str == "withdrawn" or result_str == "withdraw":
-            successful = False
-            withdrawn = True
-        elif result_str == "test":
-            test_mode = True
-            successful = True
-        elif result_str == "post":
-            post_mode = True
-            successful = False
-        else:
-            raise ArchiveException(f"Invalid result {result_str}")
-
-        nom_type = clean_text(match.groupdict().get('ntype'))
-        if nom_type not in ["CA", "GA", "FA"]:
-            raise ArchiveException(f"Unrecognized nomination type {nom_type}")
-
-        article_name = clean_text(match.groupdict().get('article'))
-        suffix = clean_text(match.groupdict().get('suffix'))
-        if suffix:
-            suffix = f" {suffix}"
-        retry = "retry " in command.split(":")[0]
-        send_message = not bool(clean_text(match.groupdict()['no_msg']))
-        custom_message = clean_text(match.groupdict()['custom'])
-        if custom_message:
-            custom_message = custom_message.split("custom message: ")[1].strip()
-            if custom_message.endswith(")"):
-                custom_message = custom_message[:-1]
-
-        return ArchiveCommand(successful=successful, nom_type=nom_type, article_name=article_name, suffix=suffix,
-                              post_mode=post_mode, retry=retry, test_mode=test_mode, withdrawn=withdrawn,
-                              send_message=send_message, custom_message=custom_message, author=author)
+        return ArchiveCommand(author=author, **parse_archive_command_values(command))
+
+
+@lru_cache(maxsize=256)
+def parse_archive_command_values(command: str):
+    """ Parses the ArchiveCommand arguments from the given command text. Cached, since the same command is often
+      re-sent or retried; callers build a fresh ArchiveCommand from the result. """
+
+    match = ARCHIVE_COMMAND_RE.search(command.strip().replace('\\n', ''))
+    if not match:
+        raise UnknownCommand("Invalid command")
+
+    result_str = clean_text(match.groupdict().get('result')).lower()
+    test_mode, post_mode, withdrawn = False, False, False
+    if result_str in ["successful", "succesful", "sucessful", "sucesful"]:
+        successful = True
+    elif result_str in ["unsuccessful", "unsuccesful", "unsucessful", "unsucesful", "failed"]:
+        successful = False
+    elif result_str == "withdrawn" or result_str == "withdraw":
+        successful = False
+        withdrawn = True
+    elif result_str == "test":
+        test_mode = True
+        successful = True
+    elif result_str == "post":
+        post_mode = True
+        successful = False
+    else:
+        raise ArchiveException(f"Invalid result {result_str}")
+
+    nom_type = clean_text(match.groupdict().get('ntype'))
+    if nom_type not in ["CA", "GA", "FA"]:
+        raise ArchiveException(f"Unrecognized nomination type {nom_type}")
+
+    article_name = clean_text(match.groupdict().get('article'))
+    suffix = clean_text(match.groupdict().get('suffix'))
+    if suffix:
+        suffix = f" {suffix}"
+    retry = "retry " in command.split(":")[0]
+    send_message = not bool(clean_text(match.groupdict()['no_msg']))
+    custom_message = clean_text(match.groupdict()['custom'])
+    if custom_message:
+        custom_message = custom_message.split("custom message: ")[1].strip()
+        if custom_message.endswith(")"):
+            custom_message = custom_message[:-1]
+
+    return dict(successful=successful, nom_type=nom_type, article_name=article_name, suffix=suffix,
+                post_mode=post_mode, retry=retry, test_mode=test_mode, withdrawn=withdrawn,
+                send_message=send_message, custom_message=custom_message)
 
 
 class ArchiveResult:
@@ -134,6 +145,7 @@ class NominationType:
         self.adjective = data["type"]
         self.mode = data["mode"]
         self.full_name = f"{self.adjective} {self.mode}"
+        self.headline = self.full_name.capitalize()
 
         self.page = f"Wookieepedia:{self.adjective} {self.mode}s"
         self.category = f"Category:Wookieepedia {self.adjective} {self.mode}s"
@@ -152,28 +164,46 @@ class NominationType:
         self.overdue_days = data["overdueDays"]
         self.notification_days = data["notificationDays"]
 
+        self._base = None
+
+    def build_url(self, page: Page, title: str):
+        if self._base is None:
+            self._base = page.site.base_url(page.site.article_path)
+        return (self._base + title).translate(URL_TRANSLATION)
+
     def build_report_message(self, page: Page, nominator: str):
-        url = (page.site.base_url(page.site.article_path) + page.title()).replace(' ', '_')
+        url = self.build_url(page, page.title())
         title = page.title().split("/", 1)[1]
         target = re.sub(" \([A-z]+ nomination\)", "", title)
-        target_url = (page.site.base_url(page.site.article_path) + target).replace(' ', '_')
+        target_url = self.build_url(page, target)
         return f"New **[{self.full_name} nomination](<{url}>)** by **{nominator}**: [{title}](<{target_url}>)"
 
     def build_review_message(self, page: Page, user_text):
-        url = (page.site.base_url(page.site.article_path) + page.title()).replace(' ', '_')
+        url = self.build_url(page, page.title())
         title = page.title().split("/", 1)[1]
         target = re.sub(" \([A-z]+ review\)", "", title)
-        target_url = (page.site.base_url(page.site.article_path) + target).replace(' ', '_')
+        target_url = self.build_url(page, target)
         u = 'written by ' + user_text if user_text else ''
         return f"[New review](<{url}>) requested for **{self.full_name}: [{title}](<{target_url}>)** {u}"
 
 
+class NomTypeMap(dict):
+    """ Maps abbreviations to NominationTypes, storing each type once while still resolving the nomination-style key
+      (i.e. FAN for FA). """
+
+    __slots__ = ()
+
+    def __missing__(self, key):
+        if key.endswith("N") and key[:-1] in self:
+            return self[key[:-1]]
+        raise KeyError(key)
+
+
 def build_nom_types(data):
-    result = {}
+    result = NomTypeMap()
     for k, v in data.items():
         x = NominationType(k, v)
         if x.mode == "topic":
             continue
         result[k] = x
-        result[f"{k}N"] = x
     return result
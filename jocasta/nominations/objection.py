@@ -473,9 +473,7 @@ def leave_talk_page_message(site, user: str, nom_page, texts: Dict[str, str]):
     if not page.exists():
         raise Exception(f"User_talk:{user} does not exist")
 
-    text_to_add = "\n\n==Overdue objections==\n"
-    for page_name, text in texts.items():
-        text_to_add += f"Regarding [[{nom_page}/{page_name}]]:\n"
+    text_to_add = "\n\n==Overdue objections==\n" + "".join(f"Regarding [[{nom_page}/{page_name}]]:\n" for page_name in texts)
 
     text_to_add += "\n\nPlease check these at your earliest convenience. The Inquisitorius, AgriCorps, and EduCorps " \
                    "appreciates your participation in our processes. {{U|JocastaBot}} ~~~~~"
@@ -1,70 +1,103 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pywikibot import Page, Category, Site, showDiff
-from typing import Dict, List, Tuple
+from pywikibot.exceptions import NoPageError
+from pywikibot.pagegenerators import PreloadingGenerator
+from typing import Dict, List, Set, Tuple
 import re
+import threading
 
-from jocasta.common import log, error_log, extract_nominator, word_count, validate_word_count, build_sub_page_name, \
-    calculate_nominated_revision, determine_target_of_nomination
+from jocasta.common import log, error_log, extract_err_msg, extract_nominator, word_count, validate_word_count, \
+    build_sub_page_name, calculate_nominated_revision, determine_target_of_nomination
 from jocasta.nominations.data import NominationType
-from jocasta.nominations.project_archiver import ProjectArchiver
+from jocasta.nominations.project_archiver import ProjectArchiver, PROCESSED_NOMINATIONS_SIZE
 
 DUMMY = "Wookieepedia:DummyCategoryPage"
+PROJECT_NAMESPACE = 4
+CATEGORY_WORKERS = 4
+WORD_COUNT_FIELD = "*'''Word count at nomination time'''"
 VIOLATION_CATEGORY = "Category:Status article nominations that violate the word count requirement"
+NOINCLUDE_ANCHORS = ("|}}</noinclude>", "}}</noinclude>", "</noinclude>")
+PROJECT_CATEGORY_RE = re.compile(r"\[\[Category:WookieeProject ([^|\]]+)\|")
+UNSORTED_PROJECT_CATEGORY_RE = re.compile(r"\[\[Category:WookieeProject [^|]+\]\]")
 
+# Guards the read-and-rewrite of the parent nomination/review pages, which are edited from several worker threads
+# (new nomination and review checks, archives, review archives)
+PARENT_PAGE_LOCK = threading.Lock()
 
-def load_current_nominations(site, nom_types: Dict[str, NominationType]) -> Dict[str, List[str]]:
+
+def load_current_nominations(site, nom_types: Dict[str, NominationType]) -> Dict[str, Set[str]]:
     """ Loads all currently-active status article nominations from the site. """
 
     nominations = {}
-    for nom_type, nom_data in nom_types.items():
-        nominations[nom_type] = []
+    for nom_data in nom_types.values():
+        nom_type = nom_data.nom_type
+        nominations[nom_type] = set()
         category = Category(site, nom_data.nomination_category)
-        for page in category.articles():
-            if "/" not in page.title():
-                continue
-            elif page.title() not in nominations[nom_type]:
-                nominations[nom_type].append(page.title())
+        for page in category.articles(namespaces=PROJECT_NAMESPACE, content=False):
+            title = page.title()
+            if "/" in title:
+                nominations[nom_type].add(title)
 
     return nominations
 
 
-def load_current_reviews(site, nom_types: Dict[str, NominationType]) -> Dict[str, List[str]]:
+def load_current_reviews(site, nom_types: Dict[str, NominationType]) -> Dict[str, Set[str]]:
     """ Loads all currently-active status article reviews from the site. """
 
     reviews = {}
-    for nom_type, nom_data in nom_types.items():
-        reviews[nom_type] = []
+    for nom_data in nom_types.values():
+        nom_type = nom_data.nom_type
+        reviews[nom_type] = set()
         category = Category(site, nom_data.review_category)
         if not category.exists():
             continue
-        for page in category.articles():
-            if "/" not in page.title():
-                continue
-            elif page.title() not in reviews[nom_type]:
-                reviews[nom_type].append(page.title())
+        for page in category.articles(namespaces=PROJECT_NAMESPACE, content=False):
+            title = page.title()
+            if "/" in title:
+                reviews[nom_type].add(title)
 
     return reviews
 
 
+def load_category_members(site, categories: List[str]) -> List[List[Page]]:
+    """ Lists the project-namespace members of each of the given categories, querying them in parallel. """
+    def members(name):
+        return list(Category(site, name).articles(namespaces=PROJECT_NAMESPACE, content=False))
+
+    with ThreadPoolExecutor(max_workers=CATEGORY_WORKERS) as executor:
+        return list(executor.map(members, categories))
+
+
 def check_for_new_nominations(site, nom_types: Dict[str, NominationType], current_nominations: dict) -> Dict[str, List[Page]]:
     """ Loads all currently-active status article nominations from the site, compares them to the previously-stored
       data, and returns the new nominations. """
 
     new_nominations = {}
-    for nom_type, nom_data in nom_types.items():
-        if not nom_type.endswith("N") or nom_data.mode == "topic":
-            continue
-        new_nominations[nom_type] = []
-        category = Category(site, nom_data.nomination_category)
-        for page in category.articles():
-            if "/" not in page.title():
+    active = [nom_data for nom_data in nom_types.values() if nom_data.mode != "topic"]
+    members = load_category_members(site, [nom_data.nomination_category for nom_data in active])
+    for nom_data, pages in zip(active, members):
+        nom_type = nom_data.nom_type
+        found = new_nominations[nom_type] = []
+        known = current_nominations.setdefault(nom_type, set())
+        for page in pages:
+            title = page.title()
+            if "/" not in title:
                 continue
-            elif page.title().endswith("/Header"):
+            elif title.endswith("/Header"):
                 continue
-            elif page.title() not in current_nominations[nom_type]:
-                log(f"New {nom_data.full_name} nomination detected: {page.title().split('/', 1)[1]}")
-                new_nominations[nom_type].append(page)
-                current_nominations[nom_type].append(page.title())
-
+            elif title not in known:
+                log(f"New {nom_data.full_name} nomination detected: {title.split('/', 1)[1]}")
+                found.append(page)
+
+    # The preload is only an optimization, so a failure here shouldn't stop the new nominations from being reported;
+    # they're only marked as known once that's settled
+    try:
+        preload_text(page for pages in new_nominations.values() for page in pages)
+    except Exception as e:
+        error_log(f"Unable to preload new nominations: {extract_err_msg(e)}")
+    for nom_type, pages in new_nominations.items():
+        current_nominations[nom_type].update(page.title() for page in pages)
     return new_nominations
 
 
@@ -73,68 +106,100 @@ def check_for_new_reviews(site, nom_types: Dict[str, NominationType], current_re
       data, and returns the new reviews. """
 
     new_reviews = {}
-    for nom_type, nom_data in nom_types.items():
-        if not nom_type.endswith("N") or nom_data.mode == "topic":
-            continue
-        new_reviews[nom_type] = []
-        category = Category(site, nom_data.review_category)
-        for page in category.articles():
-            if "/" not in page.title():
+    active = [nom_data for nom_data in nom_types.values() if nom_data.mode != "topic"]
+    members = load_category_members(site, [nom_data.review_category for nom_data in active])
+    for nom_data, pages in zip(active, members):
+        nom_type = nom_data.nom_type
+        found = new_reviews[nom_type] = []
+        known = current_reviews.setdefault(nom_type, set())
+        for page in pages:
+            title = page.title()
+            if "/" not in title:
                 continue
-            elif page.title().endswith("/Header"):
+            elif title.endswith("/Header"):
                 continue
-            elif page.title() not in current_reviews[nom_type]:
-                log(f"New {nom_data.full_name} review detected: {page.title().split('/', 1)[1]}")
-                new_reviews[nom_type].append(page)
-                current_reviews[nom_type].append(page.title())
+            elif title not in known:
+                log(f"New {nom_data.full_name} review detected: {title.split('/', 1)[1]}")
+                found.append(page)
+                known.add(title)
 
     return new_reviews
 
 
+def preload_text(pages):
+    """ Fetches the current text of the given pages in batched API requests, so that the follow-up processing of each
+      page doesn't make its own round trip for it. """
+    for _ in PreloadingGenerator(pages, groupsize=50):
+        pass
+
+
+@lru_cache(maxsize=4096)
+def ensure_user_category(site, user) -> str:
+    """ Creates the Nominations by User:<X> category if it doesn't exist yet, and returns its name. Cached, since once
+      a user's category exists there's no need to check it again on their later nominations. """
+
+    category_name = f"Category:Nominations by User:{user}"
+    category = Page(site, category_name)
+    if not category.exists():
+        category.put("Active nominations by {{U|" + user + "}}\n__EXPECTUNUSEDCATEGORY__\n\n[[Category:Nominations by user|" + user + "]]", "Creating new nomination category")
+    return category_name
+
+
 def add_categories_to_nomination(nom_page: Page, project_archiver: ProjectArchiver) -> Tuple[List[str], bool]:
     """ Given a new status article nomination, this function adds the nomination to the parent page if it is not
      already listed there, adds the 'Nominations by User:<X>' category if it's not present, and adds any relevant
      WookieeProject categories to the nomination as well. """
 
+    title = nom_page.title()
+    processed = project_archiver.processed_nominations
+    cached = processed.get(title)
+    if cached and cached[0] == nom_page.latest_revision_id:
+        return cached[1], cached[2]
+
     old_text = nom_page.get()
     user = extract_nominator(nom_page, old_text)
 
     # add the Nominations by User:X category, and create it if it's the first time a user has nominated anything
     cat_sort = build_sub_page_name(nom_page.title())
-    category_name = f"Category:Nominations by User:{user}"
-    category = Page(project_archiver.site, category_name)
-    if not category.exists():
-        category.put("Active nominations by {{U|" + user + "}}\n__EXPECTUNUSEDCATEGORY__\n\n[[Category:Nominations by user|" + user + "]]", "Creating new nomination category")
+    category_name = ensure_user_category(project_archiver.site, user)
 
     # Add the WookieeProject categories to the nomination if any are necessary
-    new_text = old_text.replace("[[{category_name}|{cat_sort}]]", "")
+    new_text = old_text
     categories = []
     if category_name not in new_text:
         categories.append(f"[[{category_name}|{cat_sort}]]")
     projects = project_archiver.identify_project_from_nom_page(nom_page)
+    present = set(PROJECT_CATEGORY_RE.findall(new_text)) if projects else set()
     for project in projects:
-        if f"[[Category:WookieeProject {project}" not in new_text:
+        if project not in present:
             categories.append(f"[[Category:WookieeProject {project}|{cat_sort}]]")
 
-    # Add the categories to the bottom of the nomination page
-    if "|}}</noinclude>" in new_text:
-        new_text = new_text.replace("|}}</noinclude>", "".join(categories) + "|}}</noinclude>")
-    elif "}}</noinclude>" in new_text:
-        new_text = new_text.replace("}}</noinclude>", "".join(categories) + "}}</noinclude>")
-    elif "</noinclude>" not in new_text:
-        error_log(f"Missing noinclude tags!")
-        if categories:
-            new_text += ("\n<noinclude>" + "".join(categories) + "</noinclude>")
-    else:
-        new_text = new_text.replace("</noinclude>", "".join(categories) + "</noinclude>")
+    # Steady-state pages with nothing to add, strip or count are left untouched, skipping the target article fetch
+    if categories or WORD_COUNT_FIELD not in old_text or UNSORTED_PROJECT_CATEGORY_RE.search(old_text):
+        # Add the categories to the bottom of the nomination page, ahead of any closing braces in the noinclude block
+        added = "".join(categories)
+        for anchor in NOINCLUDE_ANCHORS:
+            index = new_text.find(anchor)
+            if index >= 0:
+                new_text = new_text[:index] + added + new_text[index:]
+                break
+        else:
+            error_log("Missing noinclude tags!")
+            if added:
+                new_text += f"\n<noinclude>{added}</noinclude>"
 
-    new_text = re.sub("\[\[Category:WookieeProject [^\|]+\]\]", "", new_text)
-    new_text = add_nom_word_count(nom_page.site, nom_page.title(), new_text, True)
+        new_text = UNSORTED_PROJECT_CATEGORY_RE.sub("", new_text)
+        new_text = add_nom_word_count(nom_page.site, nom_page.title(), new_text, True)
 
     if old_text != new_text:
         showDiff(old_text, new_text)
         nom_page.put(new_text, "Adding user-nomination and WookieeProject categories")
-    return projects, VIOLATION_CATEGORY in new_text
+
+    flag = VIOLATION_CATEGORY in new_text
+    processed[title] = (nom_page.latest_revision_id, projects, flag)
+    if len(processed) > PROCESSED_NOMINATIONS_SIZE:
+        processed.popitem(last=False)
+    return projects, flag
 
 
 def add_nom_word_count(site, nom_title, text, check_count, nom_revision=False):
@@ -158,7 +223,7 @@ def add_nom_word_count(site, nom_title, text, check_count, nom_revision=False):
     new_text = []
     for line in text.splitlines():
         if "*'''WookieeProject (optional)''':" in line:
-            new_text.append(f"*'''Word count at nomination time''': {total} words ({intro} introduction, {body} body, {bts} behind the scenes)")
+            new_text.append(f"{WORD_COUNT_FIELD}: {total} words ({intro} introduction, {body} body, {bts} behind the scenes)")
         new_text.append(line)
         if check_count and requirement_violated and "===Object===" in line:
             new_text.append("=====JocastaBot=====")
@@ -169,58 +234,61 @@ def add_nom_word_count(site, nom_title, text, check_count, nom_revision=False):
 
 def add_subpage_to_parent(target: Page, site: Site, page_type="nomination"):
     # Ensure that the nomination is present in the parent nomination page
-    parent_page_title, subpage = target.title().split("/", 1)
-    parent_page = Page(site, parent_page_title)
-    if not parent_page.exists():
-        raise Exception(f"{parent_page_title} does not exist")
+    with PARENT_PAGE_LOCK:
+        parent_page_title, subpage = target.title().split("/", 1)
+        parent_page = Page(site, parent_page_title)
+        try:
+            text = parent_page.get()
+        except NoPageError:
+            raise Exception(f"{parent_page_title} does not exist")
 
-    text = parent_page.get()
-    expected = "{{/" + subpage + "}}"
-    if expected not in text:
-        log(f"{page_type.capitalize()} missing from parent page, adding: {subpage}")
-        text += f"\n\n{expected}"
-        parent_page.put(text, f"Adding new {page_type}: {subpage}")
+        expected = "{{/" + subpage + "}}"
+        if expected not in text:
+            log(f"{page_type.capitalize()} missing from parent page, adding: {subpage}")
+            text += f"\n\n{expected}"
+            parent_page.put(text, f"Adding new {page_type}: {subpage}")
 
 
 def remove_subpage_from_parent(*, site: Site, parent_title, subpage, retry: bool, withdrawn=False):
-    parent_page = Page(site, parent_title)
-    if not parent_page.exists():
-        raise Exception(f"{parent_title} does not exist")
-
-    expected = "{{/" + subpage + "}}"
-
-    text = parent_page.get()
-    if expected not in text:
-        if retry:
-            log(f"/{subpage} not found in nomination page on retry")
-            return
-        raise Exception(f"Cannot find /{subpage} in nomination page")
-
-    lines = text.splitlines()
-    new_lines = []
-    found = False
-    white = False
-    for line in lines:
-        if not found:
-            if line.strip() == expected:
-                found = True
-                white = True
+    with PARENT_PAGE_LOCK:
+        parent_page = Page(site, parent_title)
+        try:
+            text = parent_page.get()
+        except NoPageError:
+            raise Exception(f"{parent_title} does not exist")
+
+        expected = "{{/" + subpage + "}}"
+        if expected not in text:
+            if retry:
+                log(f"/{subpage} not found in nomination page on retry")
+                return
+            raise Exception(f"Cannot find /{subpage} in nomination page")
+
+        lines = text.splitlines()
+        new_lines = []
+        found = False
+        white = False
+        for line in lines:
+            if not found:
+                if line.strip() == expected:
+                    found = True
+                    white = True
+                else:
+                    new_lines.append(line)
+            elif white:
+                if line.strip() != "":
+                    new_lines.append(line)
+                    white = False
             else:
                 new_lines.append(line)
-        elif white:
-            if line.strip() != "":
-                new_lines.append(line)
-                white = False
+        new_text = "\n".join(new_lines)
+        if not found:
+            if retry:
+                log(f"/{subpage} not found in nomination page on retry")
+                return
+            raise Exception(f"Cannot find /{subpage} in nomination page")
+
+        if withdrawn:
+            parent_page.put(new_text, f"Archiving {subpage} per nominator request")
         else:
-            new_lines.append(line)
-    new_text = "\n".join(new_lines)
-    if not found:
-        if retry:
-            log(f"/{subpage} not found in nomination page on retry")
-            return
-        raise Exception(f"Cannot find /{subpage} in nomination page")
-
-    if withdrawn:
-        parent_page.put(new_text, f"Archiving {subpage} per nominator request")
-    else:
-        parent_page.put(new_text, f"Archiving {subpage}")
+            parent_page.put(new_text, f"Archiving {subpage}")
@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from datetime import datetime
 from pywikibot import Page, Site
 import re
@@ -9,6 +10,9 @@ from jocasta.data.filenames import *
 from jocasta.nominations.data import NominationType, build_nom_types
 from jocasta.nominations.novels import add_article_to_tables, rebuild_novels_page_text, parse_novel_page_tables
 
+IDENTIFIED_PROJECTS_SIZE = 2048
+PROCESSED_NOMINATIONS_SIZE = 10000
+
 
 # noinspection RegExpRedundantEscape
 class ProjectArchiver:
@@ -16,6 +20,10 @@ class ProjectArchiver:
 
     :type project_data: dict[str, dict]
     :type nom_types: dict[str, NominationType]
+    :type projects_by_shortcut: dict[str, str]
+    :type project_emojis: dict[str, str]
+    :type identified_projects: OrderedDict[tuple[str, int], list[str]]
+    :type processed_nominations: OrderedDict[str, tuple[int, list[str], bool]]
     """
 
     BLANK = "File:Blank portrait.svg"
@@ -29,6 +37,11 @@ class ProjectArchiver:
 
         self.project_data = {}
         self.overlapping = []
+        self.projects_by_shortcut = {}
+        self.project_emojis = {}
+        self.identified_projects = OrderedDict()
+        # nomination title -> (revision ID after processing, projects, word count violation flag)
+        self.processed_nominations = OrderedDict()
         self.reload_overlapping(project_data)
 
         if not nom_types:
@@ -40,26 +53,42 @@ class ProjectArchiver:
         self.project_data = project_data
 
         shortcuts = []
-        for d in self.project_data.values():
+        self.projects_by_shortcut = {}
+        self.project_emojis = {}
+        self.identified_projects.clear()
+        self.processed_nominations.clear()
+        for project, d in self.project_data.items():
             shortcuts += d.get("shortcut", [])
+            for s in d.get("shortcut", []):
+                self.projects_by_shortcut.setdefault(s.upper(), project)
+            e = d.get("emoji", "wook")
+            self.project_emojis[project] = "🌠" if e == ":stars:" else e
         for s in shortcuts:
             if any(i.startswith(s) for i in shortcuts if i != s):
                 self.overlapping.append(s)
 
     def find_project_from_shortcut(self, shortcut) -> Optional[str]:
-        for project, data in self.project_data.items():
-            match = [s for s in data["shortcut"] if s.upper() == shortcut.upper()]
-            if match:
-                return project
-        return None
+        return self.projects_by_shortcut.get(shortcut.upper())
 
     def identify_project_from_nom_page_name(self, nom_page_name: str):
         return self.identify_project_from_nom_page(Page(self.site, nom_page_name))
 
     def identify_project_from_nom_page(self, nom_page: Page) -> List[str]:
-        """ Parses the WookieeProject field from a nomination page to identify the related WookieeProjects. """
+        """ Parses the WookieeProject field from a nomination page to identify the related WookieeProjects. Results
+          are cached per page revision until the project data is next reloaded. """
 
         text = nom_page.get()
+        key = (nom_page.title(), nom_page.latest_revision_id)
+        if key in self.identified_projects:
+            return list(self.identified_projects[key])
+
+        projects = self.identify_projects_from_text(text)
+        self.identified_projects[key] = projects
+        if len(self.identified_projects) > IDENTIFIED_PROJECTS_SIZE:
+            self.identified_projects.popitem(last=False)
+        return list(projects)
+
+    def identify_projects_from_text(self, text: str) -> List[str]:
         match = re.search("'+WookieeProject.*'+:(.*)", text)
         if not match:
             return []
@@ -89,10 +118,7 @@ class ProjectArchiver:
         return shortcut in text
 
     def emoji_for_project(self, project) -> str:
-        e = self.project_data.get(project, {}).get("emoji", "wook")
-        if e == ":stars:":
-            e = "🌠"
-        return e
+        return self.project_emojis.get(project, "wook")
 
     @staticmethod
     def determine_continuity(article: Page) -> str:
@@ -157,7 +183,6 @@ class ProjectArchiver:
             emoji = "🌠"
         channel = target_project.get("channel")
         report = target_project.get("reportNoms")
-        print(report, channel)
         return emoji, channel if report else None
 
     def add_project_to_talk_page(self, article_title, project):
@@ -76,10 +76,8 @@ class Reviewer:
 
     @staticmethod
     def determine_nominator(site, talk_page):
-        print(talk_page.title())
         if talk_page.exists():
             users = [u for u in re.findall("\|user=(.*?)\n", talk_page.get()) if u]
-            print(users)
             if users:
                 return users[-1]
             link = re.findall("\|link=(.*?nominations.*?)\n", talk_page.get())
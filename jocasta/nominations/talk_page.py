@@ -58,7 +58,6 @@ def build_talk_page(*, talk_page: Page, nom_type: str, history_text: str, succes
         new_lines.append(history_text)
         for project in projects:
             project_talk = project_data.get(project, {}).get("template")
-            print(f"{project}: {project_talk}")
             if project_talk:
                 new_lines.append("{{" + project_talk + "}}")
         text = "\n".join(new_lines)
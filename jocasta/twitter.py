@@ -1,6 +1,7 @@
 import os
 import json
 import re
+import time
 import requests
 from tweepy import Response
 from typing import Optional, Tuple
@@ -84,7 +85,7 @@ class TwitterBot:
 
         if len(self.post_queue) > 0:
             if self.last_post_time:
-                diff = datetime.now().timestamp() - self.last_post_time.timestamp()
+                diff = time.time() - self.last_post_time.timestamp()
                 if diff < (20 * 60):
                     self.last_post_time = None
                     return
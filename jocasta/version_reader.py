@@ -38,7 +38,7 @@ def report_version_info(site, version) -> Optional[str]:
 
         if old_version is None:
             error_log("Not found!")
-        elif old_version == version:
+        elif old_version.strip() == version:
             return None
 
     updates, total = read_version_info(version)